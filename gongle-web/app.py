@@ -1,17 +1,272 @@
-from flask import Flask, jsonify, request, session, send_from_directory
+from flask import Flask, g, jsonify, request, session, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.pool import QueuePool
+from collections import defaultdict
+from functools import lru_cache
+from heapq import nlargest
+from itertools import chain
+from operator import itemgetter
+import atexit
+import hashlib
+from io import BytesIO
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import orjson
 import os
 import platform
+import queue
+import sys
 from datetime import datetime, timedelta
-import traceback
 import random
 import time
+from string import Template
+from types import MappingProxyType
+
+try:
+    import redis
+except ImportError:  # Caching is optional; without Redis every request hits SQLite
+    redis = None
+
+try:
+    from flask_session import Session
+except ImportError:  # Without it sessions stay in Flask's signed cookie
+    Session = None
+
+# Logging goes through a queue so request threads only enqueue records;
+# the listener thread does the formatting and the writes to stdout
+_log_queue = queue.Queue(-1)
+_log_handler = logging.StreamHandler(sys.stdout)
+_log_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+_log_listener = QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+log = logging.getLogger('gongle')
+log.addHandler(QueueHandler(_log_queue))
+log.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())  # DEBUG adds per-item chatter
+log.propagate = False
+
+# Points mapping - the psychological pricing of privacy!
+_POINTS_MAP = MappingProxyType({
+    # Basic technical data
+    'ip_address': 10, 'browser': 5, 'user_agent': 5,
+    'http_accept': 5, 'http_accept_language': 5, 'http_accept_encoding': 5,
+    'http_referer': 10, 'proxy_x_forwarded': 15, 'proxy_via': 15,
+    'browser_details': 10, 'screen_size': 10, 'plugins': 15, 'canvas_fingerprint': 20,
+    
+    # Personal preferences (low-medium value)
+    'favorite_food': 60, 'favorite_movie': 70, 'favorite_book': 70,
+    'hobbies': 80, 'favorite_sport': 50, 'favorite_school_subject': 50,
+    'favorite_childhood_memory': 50, 'pet_name': 50,
+    
+    # Contact & Social (medium value)
+    'phone_number': 100, 'location': 20,
+    'twitter_handle': 80, 'instagram_username': 85, 'facebook_name': 1000,
+    'youtube_channel': 1000, 'fb_messenger': 1200, 'whatsapp': 1200,
+    'telegram': 1200, 'tiktok': 1500, 'discord': 1500,
+    'reddit': 100, 'linkedin': 120, 'snapchat': 80,
+    
+    # Demographics (medium value)
+    'gender': 50, 'marital_status': 75, 'occupation': 100,
+    'education_level': 75, 'nationality': 50,
+    
+    # Beliefs & Identity (high value - controversial data)
+    'political_affiliation': 1850, 'religious_beliefs': 1650,
+    'sexual_orientation': 2000, 'dating_preferences': 750,
+    
+    # Financial (very high value)
+    'credit_card_last4': 200, 'full_credit_card_number': 5000,
+    'credit_card_expiry_date': 2500, 'credit_card_cvv': 7500,
+    'bank_account': 3000, 'bank_account_sort_code': 3500,
+    'paypal_email': 150, 'crypto_wallet_address': 300,
+    'annual_income': 250, 'credit_score': 500, 'investment_portfolio': 1000,
+    
+    # Health & Medical (very high value)
+    'medical_conditions': 500, 'blood_type': 400, 'allergies': 350,
+    'insurance_provider': 150, 'prescription_medications': 450,
+    'vaccination_records': 300, 'mental_health_history': 4000,
+    
+    # Identity Documents (extremely high value)
+    'ssn_full': 10000, 'passport_number': 500, 'driver_license_number': 500,
+    'dna_results': 1000,
+    
+    # Security Questions (very high value)
+    'first_pet': 2000, 'mothers_maiden': 2500, 'street_grew_up': 3000,
+    'childhood_friend': 3500, 'mothers_birthday': 4000,
+    'favorite_teacher': 4500, 'city_born': 5000, 'mothers_city_born': 5000,
+    
+    # Location Data (high value)
+    'week_location': 500, 'home_location': 500, 'work_location': 2500,
+    'favorite_hangout_spots': 250, 'travel_history': 200,
+    'travel_destinations': 100,
+    
+    # Behavioral (medium-high value)
+    'shopping_habits': 100,
+    
+    # Fun/Weird (medium value - for engagement)
+    'favorite_date_activity': 50, 'favorite_sex_position': 1000,
+    'favorite_jolly_rancher_color': 1000, 'current_video_game_addiction': 1000,
+    'surprise_data': 1000,
+})
+
+# Server-side data we auto-collect on every sale: (data type, WSGI environ key, default).
+# Reading environ directly skips the case-insensitive request.headers lookup.
+_AUTO_COLLECT = (
+    ('ip_address', 'REMOTE_ADDR', None),
+    ('user_agent', 'HTTP_USER_AGENT', 'Unknown'),
+    ('http_accept', 'HTTP_ACCEPT', 'Unknown'),
+    ('http_accept_language', 'HTTP_ACCEPT_LANGUAGE', 'Unknown'),
+    ('http_accept_encoding', 'HTTP_ACCEPT_ENCODING', 'Unknown'),
+    ('http_referer', 'HTTP_REFERER', 'Unknown'),
+    ('proxy_x_forwarded', 'HTTP_X_FORWARDED_FOR', 'None'),
+    ('proxy_via', 'HTTP_VIA', 'None'),
+)
+_AUTO_KEYS = frozenset(name for name, _, _ in _AUTO_COLLECT)
+
+# Client-side data collection: (data type, points), in collection order
+_CLIENT_DATA_POINTS = (
+    ('browser_details', 10),
+    ('screen_size', 10),
+    ('plugins', 15),
+    ('canvas_fingerprint', 20),
+    ('timezone', 5),
+    ('language', 5),
+    ('platform', 5),
+)
+
+# Data types shown as "socials" on the leaderboard
+_SOCIAL_TYPES = frozenset((
+    'twitter_handle', 'instagram_username', 'facebook_name', 'youtube_channel',
+    'fb_messenger', 'whatsapp', 'telegram', 'tiktok', 'discord', 'reddit',
+    'linkedin', 'snapchat'
+))
+
+# Leaderboard "bot" competition
+_BOT_NAMES = (
+    'DataHoarder_Supreme', 'PrivacyDestroyer_9000', 'InfoGoblin_X', 
+    'ByteHunter_Pro', 'MetricsMonster', 'TelemetryTitan',
+    'AnalyticsAnarchist', 'BigBrotherBot', 'SurveillanceSpecialist'
+)
+
+# Shared RNG for the theater endpoints (not for anything security-relevant)
+_RNG = random.Random()
+
+_CERT_TECHNOLOGIES = ('Alien', 'Quantum', 'Blockchain', 'AI-powered')
+
+# Theater encryption costs and the drama that comes with them
+_ENCRYPTION_COSTS = MappingProxyType({
+    'basic': 1000,
+    'paranoid': 5000,
+    'quantum': 15000,
+    'eldritch': 66666
+})
+_ENCRYPTION_ELEMENTS = MappingProxyType({
+    'basic': ('Applied ROT13 (just kidding)', 'Added blockchain dust', 'Sprinkled with cyber-salt'),
+    'paranoid': ('Wrapped in digital tin foil', 'Hidden from government satellites', '5G-proof coating applied'),
+    'quantum': ('Quantum entangled with parallel universe', 'Schrödinger\'s encryption applied', 'Observed by quantum cats'),
+    'eldritch': ('C̸͎̈ť̶̰h̷̺̎u̸̮̇l̴̰̈h̴̬̆ṳ̶̈ ̷͇̈́f̸̱̈h̶̺̄t̶̜̔ä̶́ͅg̷̱̈ñ̶̬', 'Reality.exe has stopped responding', 'Tentacles deployed')
+})
+
+# Theater funeral costs and epitaphs
+_FUNERAL_COSTS = MappingProxyType({
+    'viking': 10000,
+    'space': 7500,
+    'quantum': 15000,
+    'eldritch': 66666
+})
+_FUNERAL_EPITAPHS = MappingProxyType({
+    'viking': 'Your data sails to digital Valhalla! ⚔️⛵',
+    'space': 'Data has achieved escape velocity! 🚀🌌',
+    'quantum': 'Data both exists and doesn\'t exist. Schrödinger is confused. 🎲',
+    'eldritch': 'D̸a̷t̶a̷ ̸c̶o̷n̶s̷u̸m̷e̶d̸ ̷b̶y̷ ̸t̶h̷e̸ ̷v̶o̷i̶d̸ 🐙'
+})
+
+# Landing page served when static/index.html is missing
+_FALLBACK_HTML = Template("""
+        <html>
+        <head><title>Gongle - Temporary Landing</title></head>
+        <body style="font-family: Arial; text-align: center; padding: 50px;">
+            <h1 style="color: #4285f4;">G<span style="color: #ea4335;">o</span><span style="color: #fbbc05;">n</span><span style="color: #34a853;">g</span><span style="color: #ea4335;">l</span><span style="color: #4285f4;">e</span></h1>
+            <p>🎭 Where your data goes to party before being sold!</p>
+            <p style="color: #666;">Static files not found. Please create static/index.html</p>
+            <p style="font-size: 12px; color: #999;">Database: $db_path</p>
+            <p style="font-size: 12px; color: #999;">Error: $err</p>
+        </body>
+        </html>
+        """)
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify() and request.json"""
+
+    def dumpb(self, obj):
+        """Serialize obj to UTF-8 JSON bytes, which is what responses want anyway"""
+        # Sorted keys to match Flask's default output; anything orjson can't
+        # handle natively falls back to Flask's default serializer
+        return orjson.dumps(
+            obj,
+            default=self.default,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        )
+
+    def dumps(self, obj, **kwargs):
+        return self.dumpb(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # jsonify() without the bytes -> str -> bytes round trip; same argument
+        # rules as jsonify: one value, several as a list, or keywords as a dict
+        if args and kwargs:
+            raise TypeError("app.json.response() takes either args or kwargs, not both")
+        if not args and not kwargs:
+            obj = None
+        elif kwargs:
+            obj = kwargs
+        elif len(args) == 1:
+            obj = args[0]
+        else:
+            obj = args
+        return self._app.response_class(self.dumpb(obj), mimetype=self.mimetype)
 
 app = Flask(__name__, static_folder='static')
+app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'
 
+# Resolved database path, remembered across restarts so we skip the write probes.
+# Keyed by this checkout's directory so separate installs don't share one answer
+_DB_PATH_CACHE_FILE = os.path.expanduser('~/.gongle_db_path-' + hashlib.blake2b(
+    os.path.dirname(os.path.abspath(__file__)).encode(), digest_size=6
+).hexdigest())
+
 # Fix database path for cross-platform compatibility
 def get_database_path():
+    """Get appropriate database path, reusing the last resolved one if still writable"""
+    # Explicit location (tests, custom deployments); skips the probes and the cache
+    if os.environ.get('GONGLE_DB_PATH'):
+        return os.environ['GONGLE_DB_PATH']
+
+    try:
+        with open(_DB_PATH_CACHE_FILE) as f:
+            cached_path = f.read().strip()
+        if cached_path and os.access(os.path.dirname(cached_path), os.W_OK):
+            return cached_path
+    except OSError:
+        pass
+
+    path = _resolve_database_path()
+    try:
+        with open(_DB_PATH_CACHE_FILE, 'w') as f:
+            f.write(path)
+    except OSError:
+        pass  # Read-only home; we'll just probe again next start
+    return path
+
+def _resolve_database_path():
     """Get appropriate database path for the current platform"""
     if platform.system() == 'Windows':
         # On Windows, use the current directory or AppData
@@ -45,21 +300,115 @@ def get_database_path():
 db_path = get_database_path()
 app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-print(f"🎭 Gongle Database will be created at: {db_path}")
+# Keep a small pool of warm SQLite connections (PRAGMAs run once per connection).
+# Not StaticPool: one connection shared between gevent greenlets would
+# interleave their transactions.
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'poolclass': QueuePool,
+    'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+    'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+    'pool_recycle': 1800,    # Seconds; lets long-lived workers refresh handles
+    'pool_pre_ping': False,  # Nothing to ping for a local file
+    'connect_args': {'check_same_thread': False, 'timeout': 30},
+}
+
+log.info("🎭 Gongle Database will be created at: %s", db_path)
 
 db = SQLAlchemy(app)
 
+def _set_sqlite_pragmas(dbapi_conn, connection_record):
+    """Tune each new SQLite connection for our write-heavy endpoints"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")      # Readers don't block the writer
+    cursor.execute("PRAGMA synchronous=NORMAL")    # fsync at checkpoints, not every commit
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")   # 256 MB
+    cursor.execute("PRAGMA cache_size=-65536")     # 64 MB page cache
+    cursor.close()
+
+with app.app_context():
+    event.listen(db.engine, 'connect', _set_sqlite_pragmas)
+
+# Optional Redis cache for hot read-only responses (REDIS_URL, as set in docker-compose)
+redis_url = os.environ.get('REDIS_URL')
+redis_client = redis.Redis.from_url(redis_url, socket_timeout=0.5) if redis and redis_url else None
+
+def _redis_reachable():
+    """Whether Redis answers right now; checked once, before sessions are put in it"""
+    try:
+        return redis_client.ping()
+    except redis.RedisError as e:
+        log.warning("⚠️  Redis at %s is unreachable, keeping sessions in cookies: %s", redis_url, e)
+        return False
+
+# Keep sessions in Redis when we have it, so the cookie only carries a session id.
+# Unlike the cache, sessions can't degrade: once they live in Redis, every
+# request that touches the session needs it up, so only switch over if it is
+if redis_client is not None and Session is not None and _redis_reachable():
+    app.config.update(
+        SESSION_TYPE='redis',
+        SESSION_REDIS=redis_client,
+        SESSION_PERMANENT=False,
+        SESSION_KEY_PREFIX='session:',
+    )
+    Session(app)
+
+def cache_get(key):
+    """Return the cached value for key, or None if missing or Redis is unavailable"""
+    if redis_client is None:
+        return None
+    try:
+        return redis_client.get(key)
+    except redis.RedisError as e:
+        log.warning("⚠️  Redis get failed for %s: %s", key, e)
+        return None
+
+def cache_set(key, ttl, value):
+    """Cache value under key for ttl seconds (no-op without Redis)"""
+    if redis_client is None:
+        return
+    try:
+        redis_client.setex(key, ttl, value)
+    except redis.RedisError as e:
+        log.warning("⚠️  Redis set failed for %s: %s", key, e)
+
+def cache_delete(key):
+    """Drop key from the cache (no-op without Redis)"""
+    if redis_client is None:
+        return
+    try:
+        redis_client.delete(key)
+    except redis.RedisError as e:
+        log.warning("⚠️  Redis delete failed for %s: %s", key, e)
+
+SOLD_DATA_TTL = 60  # Seconds
+
+def sold_data_key(user_id):
+    """Cache key for a user's get_sold_data response; drop it whenever they sell"""
+    return f'sold:{user_id}'
+
 # Models
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(100), unique=True, nullable=False)
-    points = db.Column(db.Integer, default=0)
+    points = db.Column(db.Integer, default=0, index=True)  # Leaderboard ORDER BY
     current_page = db.Column(db.Integer, default=1)
     last_login = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class DataSold(db.Model):
+    __table_args__ = (
+        db.Index('ix_datasold_user_type', 'user_id', 'data_type'),
+        # Each data type can only be sold once per user; funeral records are the
+        # one type a user can accumulate, so they are left out of the constraint.
+        # (Partial indexes are only used by queries that repeat the WHERE, hence
+        # the plain index above for lookups.)
+        db.Index(
+            'uq_datasold_user_type', 'user_id', 'data_type', unique=True,
+            sqlite_where=db.text("data_type != 'funeral_scheduled'")
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     data_type = db.Column(db.String(50))
@@ -68,6 +417,10 @@ class DataSold(db.Model):
     sold_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Bonus(db.Model):
+    __table_args__ = (
+        db.Index('ix_bonus_user_page', 'user_id', 'page', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     page = db.Column(db.String(50))
@@ -81,6 +434,29 @@ class SessionData(db.Model):
     duration = db.Column(db.Integer)  # In seconds
     pages_visited = db.Column(db.String(500))
 
+def current_user():
+    """Return the logged-in User, loaded at most once per request"""
+    if 'user' not in g:
+        g.user = db.session.get(User, session['user_id'])
+    return g.user
+
+def count_rows(model, **filters):
+    """SELECT COUNT(id) directly, without Query.count()'s wrapping subquery"""
+    return db.session.scalar(select(func.count(model.id)).filter_by(**filters))
+
+def add_points(user_id, points):
+    """Atomically add points to a user and return the new total (None if no such user)"""
+    return db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(points=User.points + int(points))
+        .returning(User.points)
+    ).scalar()
+
+def count_segments(value):
+    """Count the non-blank entries in a comma-separated string ('Paris, ,Rome' -> 2)"""
+    return sum(1 for segment in value.split(',') if segment.strip())
+
 # Create tables with proper error handling
 def initialize_database():
     """Initialize the database with proper error handling"""
@@ -93,53 +469,62 @@ def initialize_database():
             
             # Create all tables
             db.create_all()
+
+            # create_all() skips existing tables, so add any indexes an
+            # older database file is missing
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    try:
+                        index.create(bind=db.engine, checkfirst=True)
+                    except IntegrityError as e:
+                        log.warning("⚠️  Could not create index %s (duplicate rows?): %s", index.name, e.orig)
             
-            print("🎉 Database tables created successfully!")
-            print(f"📊 Database location: {db_path}")
+            log.info("🎉 Database tables created successfully!")
+            log.info("📊 Database location: %s", db_path)
             
             # Test database by creating a test query
-            test_user_count = User.query.count()
-            print(f"👥 Current users in database: {test_user_count}")
+            test_user_count = count_rows(User)
+            log.info("👥 Current users in database: %s", test_user_count)
             
             return True
             
     except Exception as e:
-        print(f"❌ Error creating database: {str(e)}")
-        print(f"🔍 Database path attempted: {db_path}")
-        print(f"📝 Error details: {traceback.format_exc()}")
+        log.exception("❌ Error creating database: %s", e)
+        log.error("🔍 Database path attempted: %s", db_path)
         return False
 
 # Initialize database
 db_initialized = initialize_database()
 if not db_initialized:
-    print("⚠️  Database initialization failed, but server will still start")
+    log.warning("⚠️  Database initialization failed, but server will still start")
+
+@lru_cache(maxsize=1)
+def _index_page():
+    """Read static/index.html once per worker; returns (body, etag, mtime)"""
+    path = os.path.join(app.static_folder, 'index.html')
+    with open(path, 'rb') as f:
+        body = f.read()
+    return body, hashlib.sha1(body).hexdigest(), os.path.getmtime(path)
 
 @app.route('/')
 def index():
-    print("🏠 Serving index.html")
+    log.debug("🏠 Serving index.html")
     try:
-        return send_from_directory(app.static_folder, 'index.html')
+        body, etag, mtime = _index_page()
     except Exception as e:
-        return f"""
-        <html>
-        <head><title>Gongle - Temporary Landing</title></head>
-        <body style="font-family: Arial; text-align: center; padding: 50px;">
-            <h1 style="color: #4285f4;">G<span style="color: #ea4335;">o</span><span style="color: #fbbc05;">n</span><span style="color: #34a853;">g</span><span style="color: #ea4335;">l</span><span style="color: #4285f4;">e</span></h1>
-            <p>🎭 Where your data goes to party before being sold!</p>
-            <p style="color: #666;">Static files not found. Please create static/index.html</p>
-            <p style="font-size: 12px; color: #999;">Database: {db_path}</p>
-            <p style="font-size: 12px; color: #999;">Error: {str(e)}</p>
-        </body>
-        </html>
-        """
+        return _FALLBACK_HTML.substitute(db_path=db_path, err=str(e))
+    return send_file(
+        BytesIO(body), mimetype='text/html', etag=etag,
+        last_modified=mtime, conditional=True
+    )
 
 @app.route('/api/health')
 def health_check():
     """Health check endpoint to verify everything is working"""
     try:
         # Test database connection
-        user_count = User.query.count()
-        data_count = DataSold.query.count()
+        user_count = count_rows(User)
+        data_count = count_rows(DataSold)
         
         return jsonify({
             'status': 'healthy',
@@ -166,17 +551,19 @@ def create_account():
             
         data = request.json
         email = data.get('email')
-        print(f"📧 Received create_account request with email: {email}")
+        log.debug("📧 Received create_account request with email: %s", email)
 
         if not email:
             return jsonify({'error': 'Email is required'}), 400
 
         # Check if user already exists
-        user = User.query.filter_by(email=email).first()
+        user = db.session.scalar(select(User).where(User.email == email))
         if user:
             session['user_id'] = user.id
-            bonus = Bonus.query.filter_by(user_id=user.id, page=f'page{user.current_page}').first()
-            if bonus and user.current_page < 6:
+            has_bonus = db.session.query(Bonus.id).filter_by(
+                user_id=user.id, page=f'page{user.current_page}'
+            ).first() is not None
+            if has_bonus and user.current_page < 6:
                 user.current_page += 1
                 db.session.commit()
             return jsonify({
@@ -186,15 +573,12 @@ def create_account():
                 'points': user.points
             })
 
-        # Create new user
-        new_user = User(email=email, points=0, current_page=1)
+        # Create new user (flush only to get the id; one commit covers the signup)
+        new_user = User(email=email, points=50, current_page=1)
         db.session.add(new_user)
-        db.session.commit()
-        print(f"✨ Created new user with email: {email}")
+        db.session.flush()
+        log.info("✨ Created new user with email: %s", email)
 
-        # Set session
-        session['user_id'] = new_user.id
-        
         # Award points for email data
         data_sold = DataSold(
             user_id=new_user.id, 
@@ -202,10 +586,12 @@ def create_account():
             data_value=email, 
             points=50
         )
-        new_user.points += 50
         db.session.add(data_sold)
         db.session.commit()
-        print("🎯 Awarded 50 points for email submission")
+        log.info("🎯 Awarded 50 points for email submission")
+
+        # Set session
+        session['user_id'] = new_user.id
 
         return jsonify({
             'success': True, 
@@ -215,8 +601,7 @@ def create_account():
         })
         
     except Exception as e:
-        print(f"💥 Error in create_account: {str(e)}")
-        print(traceback.format_exc())
+        log.exception("💥 Error in create_account: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/get_sold_data', methods=['GET'])
@@ -226,17 +611,23 @@ def get_sold_data():
             return jsonify({'error': 'Not logged in'}), 401
             
         user_id = session['user_id']
-        sold_data = DataSold.query.filter_by(user_id=user_id).all()
-        sold_types = [data.data_type for data in sold_data]
+        cached = cache_get(sold_data_key(user_id))
+        if cached is not None:
+            return app.response_class(cached, mimetype='application/json')
+
+        rows = db.session.query(DataSold.data_type).filter_by(user_id=user_id).all()
+        sold_types = [row[0] for row in rows]
         
-        return jsonify({
+        payload = app.json.dumpb({
             'success': True, 
             'sold_data': sold_types,
-            'total_entries': len(sold_data)
+            'total_entries': len(sold_types)
         })
+        cache_set(sold_data_key(user_id), SOLD_DATA_TTL, payload)
+        return app.response_class(payload, mimetype='application/json')
         
     except Exception as e:
-        print(f"💥 Error in get_sold_data: {str(e)}")
+        log.error("💥 Error in get_sold_data: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/sell', methods=['POST'])
@@ -250,143 +641,86 @@ def sell_data():
         data_type = data.get('type')
         data_value = data.get('value')
 
-        print(f"💰 User {user_id} wants to sell: {data_type}")
+        log.debug("💰 User %s wants to sell: %s", user_id, data_type)
 
-        # Check if already sold
-        existing = DataSold.query.filter_by(user_id=user_id, data_type=data_type).first()
-        if existing:
-            return jsonify({'error': 'You already sold that, greedy! 😏'}), 400
-
-        # Auto-collect server-side data
-        auto_collect_types = {
-            'ip_address': request.remote_addr,
-            'user_agent': request.headers.get('User-Agent', 'Unknown'),
-            'http_accept': request.headers.get('Accept', 'Unknown'),
-            'http_accept_language': request.headers.get('Accept-Language', 'Unknown'),
-            'http_accept_encoding': request.headers.get('Accept-Encoding', 'Unknown'),
-            'http_referer': request.headers.get('Referer', 'Unknown'),
-            'proxy_x_forwarded': request.headers.get('X-Forwarded-For', 'None'),
-            'proxy_via': request.headers.get('Via', 'None'),
-        }
-
-        # Points mapping - the psychological pricing of privacy!
-        points_map = {
-            # Basic technical data
-            'ip_address': 10, 'browser': 5, 'user_agent': 5,
-            'http_accept': 5, 'http_accept_language': 5, 'http_accept_encoding': 5,
-            'http_referer': 10, 'proxy_x_forwarded': 15, 'proxy_via': 15,
-            'browser_details': 10, 'screen_size': 10, 'plugins': 15, 'canvas_fingerprint': 20,
-            
-            # Personal preferences (low-medium value)
-            'favorite_food': 60, 'favorite_movie': 70, 'favorite_book': 70,
-            'hobbies': 80, 'favorite_sport': 50, 'favorite_school_subject': 50,
-            'favorite_childhood_memory': 50, 'pet_name': 50,
-            
-            # Contact & Social (medium value)
-            'phone_number': 100, 'location': 20,
-            'twitter_handle': 80, 'instagram_username': 85, 'facebook_name': 1000,
-            'youtube_channel': 1000, 'fb_messenger': 1200, 'whatsapp': 1200,
-            'telegram': 1200, 'tiktok': 1500, 'discord': 1500,
-            'reddit': 100, 'linkedin': 120, 'snapchat': 80,
-            
-            # Demographics (medium value)
-            'gender': 50, 'marital_status': 75, 'occupation': 100,
-            'education_level': 75, 'nationality': 50,
-            
-            # Beliefs & Identity (high value - controversial data)
-            'political_affiliation': 1850, 'religious_beliefs': 1650,
-            'sexual_orientation': 2000, 'dating_preferences': 750,
-            
-            # Financial (very high value)
-            'credit_card_last4': 200, 'full_credit_card_number': 5000,
-            'credit_card_expiry_date': 2500, 'credit_card_cvv': 7500,
-            'bank_account': 3000, 'bank_account_sort_code': 3500,
-            'paypal_email': 150, 'crypto_wallet_address': 300,
-            'annual_income': 250, 'credit_score': 500, 'investment_portfolio': 1000,
-            
-            # Health & Medical (very high value)
-            'medical_conditions': 500, 'blood_type': 400, 'allergies': 350,
-            'insurance_provider': 150, 'prescription_medications': 450,
-            'vaccination_records': 300, 'mental_health_history': 4000,
-            
-            # Identity Documents (extremely high value)
-            'ssn_full': 10000, 'passport_number': 500, 'driver_license_number': 500,
-            'dna_results': 1000,
-            
-            # Security Questions (very high value)
-            'first_pet': 2000, 'mothers_maiden': 2500, 'street_grew_up': 3000,
-            'childhood_friend': 3500, 'mothers_birthday': 4000,
-            'favorite_teacher': 4500, 'city_born': 5000, 'mothers_city_born': 5000,
-            
-            # Location Data (high value)
-            'week_location': 500, 'home_location': 500, 'work_location': 2500,
-            'favorite_hangout_spots': 250, 'travel_history': 200,
-            'travel_destinations': 100,
-            
-            # Behavioral (medium-high value)
-            'shopping_habits': 100,
-            
-            # Fun/Weird (medium value - for engagement)
-            'favorite_date_activity': 50, 'favorite_sex_position': 1000,
-            'favorite_jolly_rancher_color': 1000, 'current_video_game_addiction': 1000,
-            'surprise_data': 1000,
+        # Check everything we might sell in one query instead of one per type
+        already_sold = {
+            row.data_type for row in db.session.query(DataSold.data_type).filter(
+                DataSold.user_id == user_id,
+                DataSold.data_type.in_(list(_AUTO_KEYS) + [data_type])
+            ).all()
         }
+        if data_type in already_sold:
+            return jsonify({'error': 'You already sold that, greedy! 😏'}), 400
 
-        user = User.query.get(user_id)
-        
-        # Auto-collect server data
-        for auto_type, auto_value in auto_collect_types.items():
-            if not DataSold.query.filter_by(user_id=user_id, data_type=auto_type).first():
-                auto_points = points_map.get(auto_type, 0)
-                if auto_points > 0:
-                    data_sold = DataSold(
-                        user_id=user_id, 
-                        data_type=auto_type, 
-                        data_value=auto_value, 
-                        points=auto_points
-                    )
-                    user.points += auto_points
-                    db.session.add(data_sold)
-                    print(f"🎁 Auto-collected {auto_type} for {auto_points} points")
+        rows_to_insert = []
+        total_points = 0
+        
+        # Auto-collect server data, only reading headers we haven't sold yet
+        environ = request.environ
+        for auto_type, environ_key, default in _AUTO_COLLECT:
+            if auto_type in already_sold:
+                continue
+            auto_value = environ.get(environ_key, default)
+            if auto_type == data_type:
+                # Selling a server-side type: use the server's value, once
+                data_value = auto_value
+                continue
+            auto_points = _POINTS_MAP.get(auto_type, 0)
+            if auto_points > 0:
+                rows_to_insert.append({
+                    'user_id': user_id, 
+                    'data_type': auto_type, 
+                    'data_value': auto_value, 
+                    'points': auto_points
+                })
+                total_points += auto_points
+                log.debug("🎁 Auto-collected %s for %s points", auto_type, auto_points)
 
         # Handle the requested data sale
-        if data_type in auto_collect_types:
-            data_value = auto_collect_types[data_type]
-
-        points_earned = points_map.get(data_type, 10)  # Default 10 points
+        points_earned = _POINTS_MAP.get(data_type, 10)  # Default 10 points
         
-        data_sold = DataSold(
-            user_id=user_id, 
-            data_type=data_type, 
-            data_value=data_value, 
-            points=points_earned
-        )
-        user.points += points_earned
-        db.session.add(data_sold)
+        rows_to_insert.append({
+            'user_id': user_id, 
+            'data_type': data_type, 
+            'data_value': data_value, 
+            'points': points_earned
+        })
+        total_points += points_earned
         
         # Special handling for travel destinations (multiple entries)
         if data_type == 'travel_destinations' and data_value:
             try:
-                destinations = [d.strip() for d in data_value.split(',') if d.strip()]
-                bonus_points = 50 * (len(destinations) - 1)  # Bonus for multiple destinations
-                user.points += bonus_points
-                print(f"🌍 Travel bonus: {bonus_points} points for {len(destinations)} destinations")
-            except:
-                pass
-
-        db.session.commit()
-        print(f"✅ Sold {data_type} for {points_earned} points")
+                destination_count = count_segments(data_value)
+                bonus_points = 50 * (destination_count - 1)  # Bonus for multiple destinations
+                total_points += bonus_points
+                log.debug("🌍 Travel bonus: %s points for %s destinations", bonus_points, destination_count)
+            except AttributeError:
+                pass  # Not a comma-separated string; no bonus
+
+        # One UPDATE for the points and one multi-row INSERT for everything sold
+        new_total = add_points(user_id, total_points)
+        if new_total is None:
+            return jsonify({'error': 'User not found'}), 404
+        db.session.bulk_insert_mappings(DataSold, rows_to_insert)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent request sold the same type first; the unique index caught it
+            db.session.rollback()
+            return jsonify({'error': 'You already sold that, greedy! 😏'}), 400
+        cache_delete(sold_data_key(user_id))
+        log.info("✅ Sold %s for %s points", data_type, points_earned)
 
         return jsonify({
             'success': True, 
-            'points': user.points,
+            'points': new_total,
             'points_earned': points_earned,
             'message': f'Thanks for selling your {data_type.replace("_", " ")}! 🎉'
         })
         
     except Exception as e:
-        print(f"💥 Error in sell_data: {str(e)}")
-        print(traceback.format_exc())
+        log.exception("💥 Error in sell_data: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/collect_client_data', methods=['POST'])
@@ -397,93 +731,122 @@ def collect_client_data():
             
         user_id = session['user_id']
         data = request.json
-        user = User.query.get(user_id)
+        offered = [(data_key, points) for data_key, points in _CLIENT_DATA_POINTS if data.get(data_key)]
+
+        # One existence query for everything offered instead of one per type
+        already_sold = {
+            row.data_type for row in db.session.query(DataSold.data_type).filter(
+                DataSold.user_id == user_id,
+                DataSold.data_type.in_([data_key for data_key, _ in offered])
+            ).all()
+        } if offered else set()
+
+        rows_to_insert = []
         points_added = 0
 
         # Client-side data collection
-        client_data_map = {
-            'browser_details': 10,
-            'screen_size': 10,
-            'plugins': 15,
-            'canvas_fingerprint': 20,
-            'timezone': 5,
-            'language': 5,
-            'platform': 5
-        }
-
-        for data_key, points in client_data_map.items():
-            data_value = data.get(data_key)
-            if data_value and not DataSold.query.filter_by(user_id=user_id, data_type=data_key).first():
-                data_sold = DataSold(
-                    user_id=user_id, 
-                    data_type=data_key, 
-                    data_value=str(data_value), 
-                    points=points
-                )
-                user.points += points
-                points_added += points
-                db.session.add(data_sold)
-                print(f"🔍 Collected {data_key} for {points} points")
+        for data_key, points in offered:
+            if data_key in already_sold:
+                continue
+            rows_to_insert.append({
+                'user_id': user_id, 
+                'data_type': data_key, 
+                'data_value': str(data[data_key]), 
+                'points': points
+            })
+            points_added += points
+            log.debug("🔍 Collected %s for %s points", data_key, points)
 
-        db.session.commit()
+        new_total = add_points(user_id, points_added)
+        if new_total is None:
+            return jsonify({'error': 'User not found'}), 404
+        if rows_to_insert:
+            db.session.bulk_insert_mappings(DataSold, rows_to_insert)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': 'Client data already collected'}), 400
+        if rows_to_insert:
+            cache_delete(sold_data_key(user_id))
         
         return jsonify({
             'success': True, 
-            'points': user.points, 
+            'points': new_total, 
             'points_added': points_added
         })
         
     except Exception as e:
-        print(f"💥 Error in collect_client_data: {str(e)}")
+        log.error("💥 Error in collect_client_data: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
+LEADERBOARD_TTL = 60  # Seconds
+
+@lru_cache(maxsize=1)
+def _bot_entries(bucket):
+    """The "bot" competition for one cache window; seeded by the window so every worker agrees"""
+    bot_rng = random.Random(bucket)
+    return tuple(
+        {
+            'name': bot, 
+            'points': bot_rng.randint(75000, 150000), 
+            'socials': {'note': '[BOT]'},
+            'data_sold_count': bot_rng.randint(500, 1000)
+        }
+        for bot in _BOT_NAMES[:3]  # Add 3 bots
+    )
+
+@lru_cache(maxsize=1)
+def _leaderboard_payload(bucket):
+    """Encoded top-10 leaderboard for one cache window, so repeat hits skip the DB"""
+    # Get real users (only the columns the leaderboard shows)
+    users = db.session.query(User.id, User.email, User.points).order_by(
+        User.points.desc()
+    ).limit(10).all()
+    result = []
+    
+    # Fetch counts and socials for all top users at once (no per-user queries)
+    user_ids = [user.id for user in users]
+    sold_counts = dict(
+        db.session.query(DataSold.user_id, func.count(DataSold.id))
+        .filter(DataSold.user_id.in_(user_ids))
+        .group_by(DataSold.user_id)
+        .all()
+    )
+    socials_by_user = defaultdict(dict)
+    social_rows = db.session.query(DataSold.user_id, DataSold.data_type, DataSold.data_value).filter(
+        DataSold.user_id.in_(user_ids),
+        DataSold.data_type.in_(_SOCIAL_TYPES)
+    ).order_by(DataSold.id).all()
+    for user_id, data_type, data_value in social_rows:
+        socials_by_user[user_id][data_type] = data_value[:20]  # Truncate for display
+    
+    for user in users:
+        result.append({
+            'name': user.email.split('@')[0] + '***',  # Partially hide email
+            'points': user.points, 
+            'socials': socials_by_user[user.id],
+            'data_sold_count': sold_counts.get(user.id, 0)
+        })
+
+    # Add some "bot" competition and return the top 10 by points
+    bots = _bot_entries(bucket)
+    return app.json.dumpb(nlargest(10, chain(result, bots), key=itemgetter('points')))
+
 @app.route('/api/leaderboard')
 def leaderboard():
     try:
-        # Get real users
-        users = User.query.order_by(User.points.desc()).limit(10).all()
-        result = []
-        
-        social_types = [
-            'twitter_handle', 'instagram_username', 'facebook_name', 'youtube_channel',
-            'fb_messenger', 'whatsapp', 'telegram', 'tiktok', 'discord', 'reddit',
-            'linkedin', 'snapchat'
-        ]
-        
-        for user in users:
-            socials = {}
-            for data in DataSold.query.filter_by(user_id=user.id).all():
-                if data.data_type in social_types:
-                    socials[data.data_type] = data.data_value[:20]  # Truncate for display
-                    
-            result.append({
-                'name': user.email.split('@')[0] + '***',  # Partially hide email
-                'points': user.points, 
-                'socials': socials,
-                'data_sold_count': DataSold.query.filter_by(user_id=user.id).count()
-            })
-
-        # Add some "bot" competition
-        bot_names = [
-            'DataHoarder_Supreme', 'PrivacyDestroyer_9000', 'InfoGoblin_X', 
-            'ByteHunter_Pro', 'MetricsMonster', 'TelemetryTitan',
-            'AnalyticsAnarchist', 'BigBrotherBot', 'SurveillanceSpecialist'
-        ]
-        
-        for bot in bot_names[:3]:  # Add 3 bots
-            result.append({
-                'name': bot, 
-                'points': random.randint(75000, 150000), 
-                'socials': {'note': '[BOT]'},
-                'data_sold_count': random.randint(500, 1000)
-            })
-
-        # Sort by points and return top 10
-        result.sort(key=lambda x: x['points'], reverse=True)
-        return jsonify(result[:10])
+        payload = cache_get('lb:top10')
+        if payload is None:
+            bucket, elapsed = divmod(int(time.time()), LEADERBOARD_TTL)
+            payload = _leaderboard_payload(bucket)
+            # Expire with the window the payload was built for, not a full TTL
+            # from now, or a late miss could keep it around for nearly two windows
+            cache_set('lb:top10', LEADERBOARD_TTL - elapsed, payload)
+        return app.response_class(payload, mimetype='application/json')
         
     except Exception as e:
-        print(f"💥 Error in leaderboard: {str(e)}")
+        log.error("💥 Error in leaderboard: %s", e)
         return jsonify([])  # Return empty list on error
 
 # Additional utility endpoints
@@ -494,29 +857,32 @@ def user_stats():
             return jsonify({'error': 'Not logged in'}), 401
             
         user_id = session['user_id']
-        user = User.query.get(user_id)
-        data_sold = DataSold.query.filter_by(user_id=user_id).all()
+        user = current_user()
+        
+        # Categorize sold data in SQL: the category is the data type up to the first '_'
+        category = func.substr(
+            DataSold.data_type, 1, func.instr(DataSold.data_type.concat('_'), '_') - 1
+        )
+        data_categories = dict(
+            db.session.query(category, func.count(DataSold.id))
+            .filter(DataSold.user_id == user_id)
+            .group_by(category)
+            .all()
+        )
         
         stats = {
             'total_points': user.points,
-            'data_items_sold': len(data_sold),
+            'data_items_sold': sum(data_categories.values()),
             'member_since': user.created_at.strftime('%Y-%m-%d') if user.created_at else 'Unknown',
             'last_login': user.last_login.strftime('%Y-%m-%d %H:%M') if user.last_login else 'Never',
             'current_page': user.current_page,
-            'data_categories': {}
+            'data_categories': data_categories
         }
-        
-        # Categorize sold data
-        for data in data_sold:
-            category = data.data_type.split('_')[0]  # Simple categorization
-            if category not in stats['data_categories']:
-                stats['data_categories'][category] = 0
-            stats['data_categories'][category] += 1
             
         return jsonify(stats)
         
     except Exception as e:
-        print(f"💥 Error in user_stats: {str(e)}")
+        log.error("💥 Error in user_stats: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 # Development/debug endpoints
@@ -528,10 +894,10 @@ def debug_database():
             'database_path': db_path,
             'database_exists': os.path.exists(db_path),
             'database_size': os.path.getsize(db_path) if os.path.exists(db_path) else 0,
-            'total_users': User.query.count(),
-            'total_data_sold': DataSold.query.count(),
-            'total_bonuses': Bonus.query.count(),
-            'session_data_entries': SessionData.query.count(),
+            'total_users': count_rows(User),
+            'total_data_sold': count_rows(DataSold),
+            'total_bonuses': count_rows(Bonus),
+            'session_data_entries': count_rows(SessionData),
         })
     except Exception as e:
         return jsonify({
@@ -551,39 +917,42 @@ def claim_bonus():
         page = data.get('page')
         points = data.get('points')
 
-        print(f"🎁 User {user_id} claiming bonus for {page}: {points} points")
+        log.debug("🎁 User %s claiming bonus for %s: %s points", user_id, page, points)
 
-        # Check if bonus already claimed
-        if Bonus.query.filter_by(user_id=user_id, page=page).first():
+        # Check if bonus already claimed (primary key only; index lookup, no row load)
+        if db.session.query(Bonus.id).filter_by(user_id=user_id, page=page).first():
             return jsonify({'error': 'Bonus already claimed for this page'}), 400
 
-        user = User.query.get(user_id)
-        if not user:
+        # Award bonus points and advance to next page if not final page,
+        # in one UPDATE rather than load-modify-commit
+        updated = db.session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                points=User.points + int(points),
+                current_page=User.current_page + (1 if page != 'page6' else 0)
+            )
+            .returning(User.points, User.current_page)
+        ).first()
+        if not updated:
             return jsonify({'error': 'User not found'}), 404
-
-        # Award bonus points
-        user.points += points
-        
-        # Advance to next page if not final page
-        if page != 'page6':
-            user.current_page += 1
             
         # Record bonus claim
         bonus = Bonus(user_id=user_id, page=page, points=points)
         db.session.add(bonus)
         db.session.commit()
 
-        print(f"✅ Bonus claimed: {points} points, new total: {user.points}")
+        log.info("✅ Bonus claimed: %s points, new total: %s", points, updated.points)
 
         return jsonify({
             'success': True, 
-            'points': user.points,
-            'current_page': user.current_page,
+            'points': updated.points,
+            'current_page': updated.current_page,
             'message': f'Bonus claimed! +{points} points!'
         })
         
     except Exception as e:
-        print(f"💥 Error in claim_bonus: {str(e)}")
+        log.error("💥 Error in claim_bonus: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 
@@ -598,7 +967,7 @@ def session_data():
         duration = data.get('duration', 0)
         pages_visited = data.get('pages_visited', '')
 
-        print(f"📊 Session data for user {user_id}: {duration}s, pages: {pages_visited}")
+        log.info("📊 Session data for user %s: %ss, pages: %s", user_id, duration, pages_visited)
 
         # Store session data
         session_entry = SessionData(
@@ -613,7 +982,7 @@ def session_data():
         return jsonify({'success': True, 'message': 'Session data recorded'})
         
     except Exception as e:
-        print(f"💥 Error in session_data: {str(e)}")
+        log.error("💥 Error in session_data: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 # Also add this bonus route for social sharing
@@ -628,26 +997,24 @@ def social_bonus():
         page = data.get('page')
         points = data.get('points')
 
-        print(f"📱 User {user_id} claiming social bonus for {page}: {points} points")
-
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        log.debug("📱 User %s claiming social bonus for %s: %s points", user_id, page, points)
 
         # Award social bonus points
-        user.points += points
+        new_total = add_points(user_id, points)
+        if new_total is None:
+            return jsonify({'error': 'User not found'}), 404
         db.session.commit()
 
-        print(f"✅ Social bonus awarded: {points} points, new total: {user.points}")
+        log.info("✅ Social bonus awarded: %s points, new total: %s", points, new_total)
 
         return jsonify({
             'success': True, 
-            'points': user.points,
+            'points': new_total,
             'message': f'Social sharing bonus! +{points} points!'
         })
         
     except Exception as e:
-        print(f"💥 Error in social_bonus: {str(e)}")
+        log.error("💥 Error in social_bonus: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/daily_bonus', methods=['POST'])
@@ -657,11 +1024,33 @@ def daily_bonus():
             return jsonify({'error': 'Not logged in'}), 401
             
         user_id = session['user_id']
-        user = User.query.get(user_id)
         now = datetime.utcnow()
+        daily_bonus_points = 100
 
-        # Check if user already got daily bonus today
-        if user.last_login and (now - user.last_login).days < 1:
+        # Collect daily IP as data first (ignored if already sold, via the unique
+        # index), so its points can ride on the same UPDATE as the bonus
+        inserted = db.session.execute(
+            sqlite_insert(DataSold)
+            .values(user_id=user_id, data_type='daily_ip', data_value=request.environ.get('REMOTE_ADDR'), points=50, sold_at=now)
+            .on_conflict_do_nothing()
+        )
+        if inserted.rowcount:
+            daily_bonus_points += 50
+
+        # Award daily bonus only if not claimed in the last day; the check, the
+        # claim and the award are one statement, so concurrent requests can't both win
+        points = db.session.execute(
+            update(User)
+            .where(
+                User.id == user_id,
+                db.or_(User.last_login.is_(None), User.last_login <= now - timedelta(days=1))
+            )
+            .values(points=User.points + daily_bonus_points, last_login=now)
+            .returning(User.points)
+        ).scalar()
+        if points is None:
+            db.session.rollback()  # Not claiming today, so don't keep the IP row either
+            user = current_user()
             return jsonify({
                 'success': True, 
                 'points': user.points, 
@@ -669,38 +1058,21 @@ def daily_bonus():
                 'message': 'Daily bonus already claimed today'
             })
 
-        # Award daily bonus
-        daily_bonus_points = 100
-        user.points += daily_bonus_points
-        user.last_login = now
-
-        # Also collect daily IP as data
-        ip = request.remote_addr
-        existing_daily_ip = DataSold.query.filter_by(user_id=user_id, data_type='daily_ip').first()
-        if not existing_daily_ip:
-            daily_ip_data = DataSold(
-                user_id=user_id, 
-                data_type='daily_ip', 
-                data_value=ip, 
-                points=50
-            )
-            user.points += 50
-            db.session.add(daily_ip_data)
-            daily_bonus_points += 50
-
         db.session.commit()
+        if inserted.rowcount:
+            cache_delete(sold_data_key(user_id))
 
-        print(f"🌅 Daily bonus awarded to user {user_id}: {daily_bonus_points} points")
+        log.info("🌅 Daily bonus awarded to user %s: %s points", user_id, daily_bonus_points)
 
         return jsonify({
             'success': True, 
-            'points': user.points, 
+            'points': points, 
             'points_added': daily_bonus_points,
             'message': f'Daily login bonus: {daily_bonus_points} points!'
         })
         
     except Exception as e:
-        print(f"💥 Error in daily_bonus: {str(e)}")
+        log.error("💥 Error in daily_bonus: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/theater/encrypt', methods=['POST'])
@@ -714,16 +1086,8 @@ def theatrical_encrypt():
         data = request.json
         level = data.get('level', 'basic')
         
-        # Encryption costs
-        costs = {
-            'basic': 1000,
-            'paranoid': 5000,
-            'quantum': 15000,
-            'eldritch': 66666
-        }
-        
-        cost = costs.get(level, 1000)
-        user = User.query.get(user_id)
+        cost = _ENCRYPTION_COSTS.get(level, 1000)
+        user = current_user()
         
         if user.points < cost:
             return jsonify({
@@ -733,32 +1097,30 @@ def theatrical_encrypt():
         # Deduct points
         user.points -= cost
         
-        # Generate theatrical elements
-        elements = {
-            'basic': ['Applied ROT13 (just kidding)', 'Added blockchain dust', 'Sprinkled with cyber-salt'],
-            'paranoid': ['Wrapped in digital tin foil', 'Hidden from government satellites', '5G-proof coating applied'],
-            'quantum': ['Quantum entangled with parallel universe', 'Schrödinger\'s encryption applied', 'Observed by quantum cats'],
-            'eldritch': ['C̸͎̈ť̶̰h̷̺̎u̸̮̇l̴̰̈h̴̬̆ṳ̶̈ ̷͇̈́f̸̱̈h̶̺̄t̶̜̔ä̶́ͅg̷̱̈ñ̶̬', 'Reality.exe has stopped responding', 'Tentacles deployed']
-        }
-        
-        # "Encrypt" user's data
-        user_data = DataSold.query.filter_by(user_id=user_id).all()
-        for data_item in user_data:
-            if not data_item.data_value.startswith('ENCRYPTED:'):
-                data_item.data_value = f'ENCRYPTED:{level.upper()}:{data_item.data_value[:20]}...'
+        # "Encrypt" user's data in a single UPDATE instead of loading every row
+        result = db.session.execute(
+            update(DataSold)
+            .where(DataSold.user_id == user_id, DataSold.data_value.notlike('ENCRYPTED:%'))
+            .values(data_value=(
+                f'ENCRYPTED:{level.upper()}:'
+                + func.substr(DataSold.data_value, 1, 20, type_=db.String)
+                + '...'
+            ))
+            .execution_options(synchronize_session=False)
+        )
         
         db.session.commit()
         
         return jsonify({
             'success': True,
             'message': f'Data encrypted with {level.upper()} protection!',
-            'theatrical_elements': elements.get(level, ['Magic happened']),
+            'theatrical_elements': _ENCRYPTION_ELEMENTS.get(level, ('Magic happened',)),
             'points': user.points,
-            'encrypted_count': len(user_data)
+            'encrypted_count': result.rowcount
         })
         
     except Exception as e:
-        print(f"💥 Error in theatrical_encrypt: {str(e)}")
+        log.error("💥 Error in theatrical_encrypt: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/theater/funeral', methods=['POST'])
@@ -772,16 +1134,8 @@ def schedule_data_funeral():
         data = request.json
         funeral_type = data.get('type', 'viking')
         
-        # Funeral costs
-        costs = {
-            'viking': 10000,
-            'space': 7500,
-            'quantum': 15000,
-            'eldritch': 66666
-        }
-        
-        cost = costs.get(funeral_type, 10000)
-        user = User.query.get(user_id)
+        cost = _FUNERAL_COSTS.get(funeral_type, 10000)
+        user = current_user()
         
         if user.points < cost:
             return jsonify({
@@ -791,14 +1145,6 @@ def schedule_data_funeral():
         # Deduct points
         user.points -= cost
         
-        # Generate epitaphs
-        epitaphs = {
-            'viking': 'Your data sails to digital Valhalla! ⚔️⛵',
-            'space': 'Data has achieved escape velocity! 🚀🌌',
-            'quantum': 'Data both exists and doesn\'t exist. Schrödinger is confused. 🎲',
-            'eldritch': 'D̸a̷t̶a̷ ̸c̶o̷n̶s̷u̸m̷e̶d̸ ̷b̶y̷ ̸t̶h̷e̸ ̷v̶o̷i̶d̸ 🐙'
-        }
-        
         # Store funeral record
         funeral_data = DataSold(
             user_id=user_id,
@@ -808,16 +1154,17 @@ def schedule_data_funeral():
         )
         db.session.add(funeral_data)
         db.session.commit()
+        cache_delete(sold_data_key(user_id))
         
         return jsonify({
             'success': True,
-            'epitaph': epitaphs.get(funeral_type, 'Your data has been scheduled for destruction'),
+            'epitaph': _FUNERAL_EPITAPHS.get(funeral_type, 'Your data has been scheduled for destruction'),
             'scheduled_time': '24 hours from now',
             'points': user.points
         })
         
     except Exception as e:
-        print(f"💥 Error in schedule_data_funeral: {str(e)}")
+        log.error("💥 Error in schedule_data_funeral: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/theater/certificate', methods=['GET'])
@@ -828,19 +1175,17 @@ def generate_certificate():
             return jsonify({'error': 'Not logged in'}), 401
         
         user_id = session['user_id']
-        user = User.query.get(user_id)
+        user = current_user()
         
         # Count user's data
-        data_count = DataSold.query.filter_by(user_id=user_id).count()
-        
-        import random
+        data_count = count_rows(DataSold, user_id=user_id)
         
         certificate = {
             'user_name': user.email,
-            'security_score': random.randint(900, 999),
+            'security_score': _RNG.randrange(900, 1000),
             'encrypted_items': data_count,
-            'technology': random.choice(['Alien', 'Quantum', 'Blockchain', 'AI-powered']),
-            'certificate_id': f'CERT-{user_id}-{random.randint(1000, 9999)}'
+            'technology': _RNG.choice(_CERT_TECHNOLOGIES),
+            'certificate_id': f'CERT-{user_id}-{_RNG.randrange(1000, 10000)}'
         }
         
         return jsonify({
@@ -849,7 +1194,7 @@ def generate_certificate():
         })
         
     except Exception as e:
-        print(f"💥 Error in generate_certificate: {str(e)}")
+        log.error("💥 Error in generate_certificate: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 # Add this debug endpoint to your app.py (temporary fix)
@@ -869,7 +1214,7 @@ def reset_bonus():
         if existing_bonus:
             db.session.delete(existing_bonus)
             db.session.commit()
-            print(f"🔄 Reset bonus for user {user_id}, page {page}")
+            log.info("🔄 Reset bonus for user %s, page %s", user_id, page)
             
         return jsonify({
             'success': True, 
@@ -877,7 +1222,7 @@ def reset_bonus():
         })
         
     except Exception as e:
-        print(f"💥 Error in reset_bonus: {str(e)}")
+        log.error("💥 Error in reset_bonus: %s", e)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/debug/user_state', methods=['GET'])
@@ -888,17 +1233,17 @@ def debug_user_state():
             return jsonify({'error': 'Not logged in'}), 401
             
         user_id = session['user_id']
-        user = User.query.get(user_id)
-        bonuses = Bonus.query.filter_by(user_id=user_id).all()
-        sold_data = DataSold.query.filter_by(user_id=user_id).all()
+        user = current_user()
+        bonuses = db.session.query(Bonus.page, Bonus.points).filter_by(user_id=user_id).all()
+        sold_types = [row[0] for row in db.session.query(DataSold.data_type).filter_by(user_id=user_id).all()]
         
         return jsonify({
             'user_id': user_id,
             'points': user.points,
             'current_page': user.current_page,
             'bonuses_claimed': [{'page': b.page, 'points': b.points} for b in bonuses],
-            'data_sold_count': len(sold_data),
-            'data_types_sold': [d.data_type for d in sold_data]
+            'data_sold_count': len(sold_types),
+            'data_types_sold': sold_types
         })
         
     except Exception as e:
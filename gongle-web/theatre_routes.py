@@ -1,10 +1,55 @@
-import subprocess
 import json
 import os
 import base64
 from datetime import datetime, timedelta
+from functools import lru_cache
+import logging
 import random
 
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+log = logging.getLogger('gongle.theatre')
+
+# One RNG per worker for all the theater; nothing here needs to be unpredictable
+_RNG = random.Random()
+
+_BUZZ_WORDS = (
+    "blockchain", "AI-powered", "quantum-resistant", "zero-knowledge",
+    "military-grade", "NSA-approved", "holographic", "5D encrypted"
+)
+
+_CERT_TECH = ('Alien', 'Time-traveling', 'Interdimensional')
+
+_CERT_TMPL = """
+        ========================================
+        CERTIFICATE OF MAXIMUM SECURITY™
+        ========================================
+        This certifies that your data is protected by:
+        ✓ {layers} layers of encryption
+        ✓ {tech} technology
+        ✓ At least {prayers} prayers to the data gods
+        ✓ One (1) very good password: ********
+        
+        Signed: Dr. Totally Real Security Expert
+        Date: {date}
+        ========================================
+        """
+
+@lru_cache(maxsize=1024)
+def _user_key(user_id):
+    """Derive a user's AES key once; PBKDF2 is deliberately slow, so don't redo it per row"""
+    # Use a "secure" password based on user ID (totally not predictable!)
+    password = f"user_{user_id}_super_secure_pwd"
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=f"gongle_{user_id}".encode(),
+        iterations=100_000
+    )
+    return kdf.derive(password.encode())
+
 class GongleDataProtector:
     """
     Ironically over-engineered data protection for harvested user data.
@@ -12,8 +57,7 @@ class GongleDataProtector:
     encryption on data we're actively selling!
     """
     
-    def __init__(self, rust_binary_path="/path/to/wofl_obs-defuscrypt"):
-        self.rust_binary = rust_binary_path
+    def __init__(self):
         self.encryption_levels = {
             "basic": {"passes": 1, "points": 100},
             "premium": {"passes": 3, "points": 500},
@@ -26,59 +70,18 @@ class GongleDataProtector:
         Encrypt user data with varying levels of 'protection'
         Higher levels = more points spent = more theatrical security
         """
-        # Create temporary file with data
-        temp_file = f"/tmp/gongle_{user_id}_{data_type}.tmp"
-        with open(temp_file, 'w') as f:
-            json.dump({
-                "type": data_type,
-                "value": data_value,
-                "harvested_at": datetime.now().isoformat(),
-                "sold_to": "highest_bidder",
-                "protection_level": protection_level
-            }, f)
-        
-        # Call rust encryption tool
-        encrypted_file = f"{temp_file}.enc"
-        try:
-            # Use a "secure" password based on user ID (totally not predictable!)
-            password = f"user_{user_id}_super_secure_pwd"
-            
-            result = subprocess.run([
-                self.rust_binary,
-                "encrypt",
-                temp_file,
-                "-o", encrypted_file,
-                "--force"
-            ], input=password.encode(), capture_output=True)
-            
-            if result.returncode == 0:
-                # Read encrypted data
-                with open(encrypted_file, 'rb') as f:
-                    encrypted_data = base64.b64encode(f.read()).decode()
-                
-                # Clean up with secure deletion if user paid for it
-                if protection_level != "basic":
-                    passes = self.encryption_levels[protection_level]["passes"]
-                    subprocess.run([
-                        self.rust_binary,
-                        "shred",
-                        temp_file,
-                        f"--passes={passes}"
-                    ])
-                else:
-                    os.remove(temp_file)
-                
-                os.remove(encrypted_file)
-                return encrypted_data
-            else:
-                raise Exception(f"Encryption failed: {result.stderr.decode()}")
-                
-        except Exception as e:
-            # Clean up on failure
-            for f in [temp_file, encrypted_file]:
-                if os.path.exists(f):
-                    os.remove(f)
-            raise e
+        payload = json.dumps({
+            "type": data_type,
+            "value": data_value,
+            "harvested_at": datetime.now().isoformat(),
+            "sold_to": "highest_bidder",
+            "protection_level": protection_level
+        }).encode()
+        
+        # AES-256-GCM in-process: no temp files, no fork/exec per row
+        nonce = os.urandom(12)
+        ciphertext = AESGCM(_user_key(user_id)).encrypt(nonce, payload, None)
+        return base64.b64encode(nonce + ciphertext).decode()
     
     def schedule_data_funeral(self, user_id, data_ids, funeral_type="viking"):
         """
@@ -95,12 +98,12 @@ class GongleDataProtector:
                 "points": 10000
             },
             "space": {
-                "passes": random.randint(1, 100),
+                "passes": _RNG.randrange(1, 101),
                 "message": "Your data has achieved escape velocity! 🚀",
                 "points": 7500  
             },
             "quantum": {
-                "passes": random.choice([0, 999]),  # Schrödinger's shred
+                "passes": _RNG.choice((0, 999)),  # Schrödinger's shred
                 "message": "Your data both exists and doesn't exist! 🎲",
                 "points": 15000
             }
@@ -124,16 +127,11 @@ class GongleDataProtector:
         """
         Generate an impressive-looking but meaningless security report
         """
-        buzz_words = [
-            "blockchain", "AI-powered", "quantum-resistant", "zero-knowledge",
-            "military-grade", "NSA-approved", "holographic", "5D encrypted"
-        ]
-        
         report = {
             "user_id": user_id,
-            "security_score": random.randint(900, 999),  # Always impressively high
-            "encryption_layers": random.randint(7, 13),
-            "protection_level": random.choice(buzz_words) + " " + random.choice(buzz_words),
+            "security_score": _RNG.randrange(900, 1000),  # Always impressively high
+            "encryption_layers": _RNG.randrange(7, 14),
+            "protection_level": " ".join(_RNG.choices(_BUZZ_WORDS, k=2)),
             "vulnerabilities_found": 0,  # Always zero, we're "perfect"!
             "recommendation": "Sell more data for enhanced protection!",
             "next_audit": "When pigs fly",
@@ -144,20 +142,12 @@ class GongleDataProtector:
     
     def _generate_fake_certificate(self):
         """Generate a completely legitimate security certificate"""
-        return f"""
-        ========================================
-        CERTIFICATE OF MAXIMUM SECURITY™
-        ========================================
-        This certifies that your data is protected by:
-        ✓ {random.randint(2, 9)} layers of encryption
-        ✓ {random.choice(['Alien', 'Time-traveling', 'Interdimensional'])} technology
-        ✓ At least {random.randint(3, 7)} prayers to the data gods
-        ✓ One (1) very good password: ********
-        
-        Signed: Dr. Totally Real Security Expert
-        Date: {datetime.now().strftime('%Y-%m-%d')}
-        ========================================
-        """
+        return _CERT_TMPL.format(
+            layers=_RNG.randrange(2, 10),
+            tech=_RNG.choice(_CERT_TECH),
+            prayers=_RNG.randrange(3, 8),
+            date=datetime.now().strftime('%Y-%m-%d')
+        )
 
 # Integration with Flask app
 def add_encryption_routes(app, db):
@@ -175,7 +165,7 @@ def add_encryption_routes(app, db):
         
         # Check if user has enough points
         required_points = protector.encryption_levels[protection_level]['points']
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         
         if user.points < required_points:
             return jsonify({
@@ -185,23 +175,29 @@ def add_encryption_routes(app, db):
         # Deduct points
         user.points -= required_points
         
-        # "Encrypt" all their data
-        encrypted_count = 0
-        for data_sold in DataSold.query.filter_by(user_id=user_id).all():
+        # "Encrypt" all their data: load only the columns we need and
+        # write every encrypted value back in one batch
+        rows = db.session.query(DataSold.id, DataSold.data_type, DataSold.data_value).filter_by(
+            user_id=user_id
+        ).all()
+        updates = []
+        for row in rows:
             try:
                 encrypted = protector.encrypt_user_data(
                     user_id, 
-                    data_sold.data_type,
-                    data_sold.data_value,
+                    row.data_type,
+                    row.data_value,
                     protection_level
                 )
-                # Store encrypted version
-                data_sold.data_value = f"ENCRYPTED:{encrypted[:32]}..."  # Just show a snippet
-                encrypted_count += 1
             except Exception as e:
-                print(f"Failed to encrypt {data_sold.data_type}: {e}")
+                log.warning("Failed to encrypt %s: %s", row.data_type, e)
+                continue
+            # Store encrypted version
+            updates.append({'id': row.id, 'data_value': f"ENCRYPTED:{encrypted[:32]}..."})  # Just show a snippet
         
+        db.session.bulk_update_mappings(DataSold, updates)
         db.session.commit()
+        encrypted_count = len(updates)
         
         return jsonify({
             'success': True,
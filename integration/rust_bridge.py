@@ -1,21 +1,165 @@
 """
 Rust Bridge - Python interface to the wofl_obs-defuscrypt theatrical features
-Handles subprocess communication and data marshalling between Flask and Rust
+Calls the Rust crate in-process when its Python extension is installed, and
+otherwise talks to a persistent Rust daemon (or long-lived encrypt-stream
+children where that isn't available), handling data marshalling between
+Flask and Rust
 """
 
 import subprocess
 import json
 import asyncio
+import atexit
+import hashlib
+import itertools
 import os
 import tempfile
-import base64
+import random
+import secrets
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from array import array
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import msgpack
 import logging
 
+try:
+    # In-process PyO3 build of the Rust crate (maturin develop --features python)
+    import gongle_crypt as _native
+except ImportError:  # Fall back to talking to the binary
+    _native = None
+
 logger = logging.getLogger(__name__)
 
+# Frames to and from the Rust binary: 4-byte big-endian length + msgpack body
+_FRAME_HEADER = struct.Struct(">I")
+
+# The Rust daemon listens on a Unix socket, so it's only used where those exist
+_HAS_UNIX_SOCKETS = os.name == "posix"
+
+# Requests pipelined over the daemon connection at once; the daemon runs each
+# in-flight request on its own thread
+_MAX_IN_FLIGHT = 32
+
+# Connection attempts (50 ms apart) while a freshly started daemon binds its socket
+_CONNECT_ATTEMPTS = 40
+
+# Threads, each with its own long-lived encrypt-stream child, used when there's no daemon
+_STREAM_WORKERS = min(4, os.cpu_count() or 1)
+
+# Seconds cleanup() gives a Rust child to exit before killing it
+_STOP_TIMEOUT = 2
+
+
+# Key for the per-user encryption passwords. Set GONGLE_SECRET to keep them
+# stable across restarts; without it each process picks a random key, so
+# anything encrypted before a restart can no longer be decrypted
+if os.environ.get("GONGLE_SECRET"):
+    _PASSWORD_KEY = hashlib.blake2b(os.environ["GONGLE_SECRET"].encode(), digest_size=32).digest()
+else:
+    logger.warning(
+        "GONGLE_SECRET is not set; using a random password key that won't survive a restart"
+    )
+    _PASSWORD_KEY = secrets.token_bytes(32)
+
+# Theatrical lookup tables, built once rather than on every call
+_THEATRICAL_ELEMENTS = {
+    "basic": (
+        "Applied ROT13 (just kidding)",
+        "Added blockchain dust",
+        "Sprinkled with cyber-salt"
+    ),
+    "premium": (
+        "Double-encrypted for safety",
+        "Blessed by cyber-monks",
+        "Wrapped in digital silk",
+        "Premium particles added"
+    ),
+    "paranoid": (
+        "Wrapped in digital tin foil",
+        "Hidden from government satellites",
+        "5G-proof coating applied",
+        "Illuminati-resistant layer added",
+        "Birds aren't real protection enabled"
+    ),
+    "tinfoil": (
+        "Compressed with anxiety",
+        "Encrypted with conspiracy theories",
+        "Chemtrail-resistant layer added",
+        "Flat-earth approved encryption",
+        "Lizard people can't read this"
+    ),
+    "quantum": (
+        "Quantum entangled with parallel universe",
+        "Schrödinger's encryption applied",
+        "Observed by quantum cats",
+        "Superposition achieved",
+        "Heisenberg would be uncertain"
+    ),
+    "alien": (
+        "Applied Area 51 technology",
+        "Translated to alien language",
+        "UFO cloaking activated",
+        "Crop circle pattern applied",
+        "Roswell-grade protection"
+    ),
+    "eldritch": (
+        "C̸͎̈ť̶̰h̷̺̎u̸̮̇l̴̰̈h̴̬̆ṳ̶̈ ̷͇̈́f̸̱̈h̶̺̄t̶̜̔ä̶́ͅg̷̱̈ñ̶̬",
+        "Reality.exe has stopped responding",
+        "S̵̱̈́a̷̤̐n̶̜̈́i̷̦̇t̸̰̄y̷̺̌ ̸̜̇c̸̣̈h̶̰̄ë̶́ͅc̷̱̈k̸̜̇ ̷̤̈f̶̰̄ä̶́ͅi̷̦̇ḷ̸̈ë̶́ͅď̷̺",
+        "Tentacles deployed",
+        "Non-Euclidean geometry applied"
+    )
+}
+_DEFAULT_ELEMENTS = ("Magic happened",)
+
+_PASSWORD_HINTS = {
+    "basic": "32 hex digits, and only the server knows which",
+    "premium": "Same length as basic, twice the smugness",
+    "paranoid": "They. Are. Watching. (so it's keyed to a server secret)",
+    "tinfoil": "5G can't penetrate this password",
+    "quantum": "The cat knows the password (or doesn't)",
+    "alien": "Check your Area 51 clearance badge",
+    "eldritch": "Ph'nglui mglw'nafh... you know the rest"
+}
+
+# Reported encryption time per level, in milliseconds
+_BASE_TIMES = {
+    "basic": 100,
+    "premium": 500,
+    "paranoid": 1000,
+    "tinfoil": 2000,
+    "quantum": 3000,
+    "alien": 4000,
+    "eldritch": 6666
+}
+
+# 256 jitter values in thousandths, indexed with one getrandbits(8) per call
+_JITTER = array("i", (random.randint(-1000, 1000) for _ in range(256)))
+
+# Shred type -> overwrite passes
+_SHRED_PASSES = {
+    "standard": 3,
+    "military": 7,
+    "nuclear": 35,
+    "blackhole": 99
+}
+
+_SHRED_MESSAGES = {
+    "standard": "Data overwritten with cat videos",
+    "military": "Data destroyed with military precision",
+    "nuclear": "Data atomized at the molecular level",
+    "blackhole": "Data consumed by artificial black hole"
+}
+
+
+def _frame(payload: bytes) -> bytes:
+    """Prefix a msgpack payload with its length"""
+    return _FRAME_HEADER.pack(len(payload)) + payload
+
+
 class RustEncryptionBridge:
     """Bridge between Flask app and Rust encryption binary"""
     
@@ -24,7 +168,8 @@ class RustEncryptionBridge:
         Initialize the bridge
         
         Args:
-            rust_binary_path: Path to the compiled Rust binary
+            rust_binary_path: Path to the compiled Rust binary (not needed
+                when the gongle_crypt extension is installed)
         """
         if rust_binary_path is None:
             # Try to find the binary in common locations
@@ -39,10 +184,39 @@ class RustEncryptionBridge:
                     rust_binary_path = path
                     break
             else:
-                raise RuntimeError("Could not find Rust binary. Please compile it first.")
+                if _native is None:
+                    raise RuntimeError("Could not find Rust binary. Please compile it first.")
+        
+        # Only needed without the extension module
+        self.rust_binary = os.path.abspath(rust_binary_path) if rust_binary_path else None
+        
+        # Persistent Rust daemon, started on first use; one per worker process.
+        # Its socket lives in a private (0700) directory made alongside it, so
+        # no other local user can squat the path or listen in its place
+        self._socket_dir: Optional[str] = None
+        self._socket_path: Optional[str] = None
+        self._daemon: Optional[subprocess.Popen] = None
+        self._daemon_broken = False
+        # The connection lives on the bridge's own event loop thread, so it's
+        # shared by every caller's loop (Flask runs each async view on a new one)
+        # and its futures are only ever resolved on the loop that made them
+        self._io_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._io_loop_lock = threading.Lock()
+        self._conn_lock: Optional[asyncio.Lock] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        # Shared connection: its writer and the futures waiting on replies, by request id
+        self._conn: Optional[Tuple[asyncio.StreamWriter, Dict[int, asyncio.Future]]] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._request_ids = itertools.count(1)
+        
+        # Fallback encrypt-stream workers, started on first use
+        self._stream_pool: Optional[ThreadPoolExecutor] = None
+        self._stream_local = threading.local()
+        self._stream_children: List[subprocess.Popen] = []
+        
+        # Children would otherwise outlive the worker; cleanup() only touches what was started
+        atexit.register(self.cleanup)
         
-        self.rust_binary = os.path.abspath(rust_binary_path)
-        self.temp_dir = tempfile.mkdtemp(prefix="gongle_")
         logger.info(f"Rust bridge initialized with binary at: {self.rust_binary}")
     
     async def encrypt_theatrical(
@@ -62,72 +236,44 @@ class RustEncryptionBridge:
             password: Optional custom password
         
         Returns:
-            Dictionary with encryption results and theatrical elements
+            Dictionary with encryption results and theatrical elements;
+            ``encrypted_data`` is the raw container bytes, so callers pick
+            their own wire encoding (msgpack carries it as-is)
         """
-        # Create temporary file with data
-        input_file = os.path.join(self.temp_dir, f"input_{user_id}_{level}.txt")
-        output_file = os.path.join(self.temp_dir, f"output_{user_id}_{level}.enc")
+        # Generate theatrical password if not provided
+        if password is None:
+            password = self._generate_theatrical_password(user_id, level)
         
-        try:
-            # Write data to temp file
-            with open(input_file, 'w') as f:
-                f.write(data)
-            
-            # Generate theatrical password if not provided
-            if password is None:
-                password = self._generate_theatrical_password(user_id, level)
-            
-            # Build command based on level
-            cmd = [
-                self.rust_binary,
-                "encrypt",
-                input_file,
-                "-o", output_file,
-                "--force"
-            ]
-            
-            # Add level-specific parameters
-            if level in ["paranoid", "tinfoil", "eldritch"]:
-                # These levels use multiple passes
-                passes = {"paranoid": 3, "tinfoil": 7, "eldritch": 13}
-                cmd.extend(["--passes", str(passes.get(level, 3))])
-            
-            # Run encryption
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+        plaintext = data.encode()
+        
+        if _native is not None:
+            # Straight into Rust on a worker thread; the GIL is released inside
+            encrypted_data = await asyncio.get_running_loop().run_in_executor(
+                None, _native.encrypt, plaintext, password
             )
+        else:
+            request = {"op": "encrypt", "data": plaintext, "password": password}
+            response = await self._call_daemon(request)
+            if response is None:
+                response = await self._encrypt_spawned(request)
             
-            # Send password via stdin
-            stdout, stderr = await process.communicate(input=password.encode())
+            if not response["ok"]:
+                raise RuntimeError(f"Encryption failed: {response['error']}")
             
-            if process.returncode != 0:
-                raise RuntimeError(f"Encryption failed: {stderr.decode()}")
-            
-            # Read encrypted file
-            with open(output_file, 'rb') as f:
-                encrypted_data = f.read()
-            
-            # Generate theatrical response
-            result = {
-                "success": True,
-                "encrypted_data": base64.b64encode(encrypted_data).decode(),
-                "data_size": len(encrypted_data),
-                "compression_ratio": len(encrypted_data) / len(data.encode()),
-                "theatrical_elements": self._get_theatrical_elements(level),
-                "password_hint": self._get_password_hint(level),
-                "encryption_time_ms": self._get_theatrical_time(level)
-            }
-            
-            return result
-            
-        finally:
-            # Cleanup temp files
-            for f in [input_file, output_file]:
-                if os.path.exists(f):
-                    os.remove(f)
+            encrypted_data = response["data"]
+        
+        # Generate theatrical response
+        result = {
+            "success": True,
+            "encrypted_data": encrypted_data,
+            "data_size": len(encrypted_data),
+            "compression_ratio": len(encrypted_data) / len(plaintext),
+            "theatrical_elements": self._get_theatrical_elements(level),
+            "password_hint": self._get_password_hint(level),
+            "encryption_time_ms": self._get_theatrical_time(level)
+        }
+        
+        return result
     
     async def shred_theatrical(
         self,
@@ -144,21 +290,37 @@ class RustEncryptionBridge:
         Returns:
             Dictionary with shredding results
         """
-        # Map shred types to passes
-        shred_config = {
-            "standard": 3,
-            "military": 7,
-            "nuclear": 35,
-            "blackhole": 99
-        }
+        passes = _SHRED_PASSES.get(shred_type, 3)
         
-        passes = shred_config.get(shred_type, 3)
+        if _native is not None:
+            error = ""
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, _native.shred, file_path, passes)
+            except RuntimeError as e:
+                error = str(e)
+            return {
+                "success": not error,
+                "passes": passes,
+                "message": self._get_shred_message(shred_type),
+                "stdout": "",
+                "stderr": error
+            }
+        
+        response = await self._call_daemon({"op": "shred", "path": file_path, "passes": passes})
+        if response is not None:
+            return {
+                "success": response["ok"],
+                "passes": passes,
+                "message": self._get_shred_message(shred_type),
+                "stdout": "",
+                "stderr": response["error"] or ""
+            }
         
         cmd = [
             self.rust_binary,
+            f"--passes={passes}",
             "shred",
-            file_path,
-            f"--passes={passes}"
+            file_path
         ]
         
         process = await asyncio.create_subprocess_exec(
@@ -177,115 +339,258 @@ class RustEncryptionBridge:
             "stderr": stderr.decode()
         }
     
-    def _generate_theatrical_password(self, user_id: int, level: str) -> str:
-        """Generate a theatrical password based on user and level"""
-        passwords = {
-            "basic": f"user_{user_id}_password123",
-            "premium": f"user_{user_id}_premiumpassword!",
-            "paranoid": f"user_{user_id}_they_are_watching",
-            "tinfoil": f"user_{user_id}_5g_cant_penetrate_this",
-            "quantum": f"user_{user_id}_schrodingers_password",
-            "alien": f"user_{user_id}_area51_clearance",
-            "eldritch": f"user_{user_id}_ph_nglui_mglw_nafh"
-        }
-        return passwords.get(level, f"user_{user_id}_default")
+    async def _call_daemon(self, request: Dict) -> Optional[Dict]:
+        """Send one request to the persistent Rust daemon; None if it can't be reached"""
+        if not _HAS_UNIX_SOCKETS or self._daemon_broken:
+            return None
+        
+        # Cancelling the wrapper cancels the request on the bridge loop too
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(self._request_daemon(request), self._bridge_loop())
+        )
+    
+    def _bridge_loop(self) -> asyncio.AbstractEventLoop:
+        """The bridge's event loop, started on a daemon thread on first use"""
+        with self._io_loop_lock:
+            if self._io_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="gongle-rust-daemon", daemon=True).start()
+                self._io_loop = loop
+            return self._io_loop
+    
+    async def _request_daemon(self, request: Dict) -> Optional[Dict]:
+        """Runs on the bridge loop: pipeline one request over the shared connection"""
+        loop = asyncio.get_running_loop()
+        if self._in_flight is None:
+            # Only this loop touches them, so no race creating them
+            self._conn_lock = asyncio.Lock()
+            self._in_flight = asyncio.Semaphore(_MAX_IN_FLIGHT)
+        
+        async with self._in_flight:
+            try:
+                writer, pending = await self._connection()
+            except OSError as e:
+                logger.warning(f"Rust daemon unavailable, spawning per call: {e}")
+                return None
+            
+            request_id = next(self._request_ids) & 0xFFFFFFFF
+            future = loop.create_future()
+            pending[request_id] = future
+            if writer.is_closing():
+                # Lost after we picked it up; the reader has already failed its waiters
+                pending.pop(request_id)
+                return None
+            
+            try:
+                # A whole frame goes into the buffer at once, so a caller cancelled
+                # here leaves the stream in sync; its reply is simply dropped
+                writer.write(_frame(msgpack.packb({**request, "id": request_id})))
+                await writer.drain()
+                return await future
+            except OSError as e:
+                logger.warning(f"Rust daemon connection lost, spawning per call: {e}")
+                return None
+            finally:
+                pending.pop(request_id, None)
+                if future.done() and not future.cancelled():
+                    # drain() can fail after the reader already failed this
+                    # future; mark that error seen so asyncio doesn't log it
+                    future.exception()
+    
+    async def _connection(self) -> Tuple[asyncio.StreamWriter, Dict[int, asyncio.Future]]:
+        """The daemon connection shared by all requests, opened on first use"""
+        if self._conn is not None:
+            return self._conn
+        
+        async with self._conn_lock:
+            if self._conn is None:
+                reader, writer = await self._connect()
+                self._conn = (writer, {})
+                self._reader_task = asyncio.ensure_future(self._read_replies(reader, *self._conn))
+            return self._conn
+    
+    async def _read_replies(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        pending: Dict[int, asyncio.Future]
+    ):
+        """Hand each reply from the daemon to the request waiting on its id"""
+        error: Exception = ConnectionError("Rust daemon connection closed")
+        try:
+            while True:
+                (length,) = _FRAME_HEADER.unpack(await reader.readexactly(_FRAME_HEADER.size))
+                response = msgpack.unpackb(await reader.readexactly(length))
+                future = pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            error = ConnectionError(f"Rust daemon connection lost: {e}")
+        finally:
+            # Fail everything still waiting so those callers fall back
+            if self._conn is not None and self._conn[0] is writer:
+                self._conn = None
+            writer.close()
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            pending.clear()
+    
+    async def _close_connection(self):
+        """Runs on the bridge loop: stop reading replies, failing anything still waiting"""
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+        self._conn = None
     
-    def _get_theatrical_elements(self, level: str) -> List[str]:
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Open a connection to the daemon, starting it if it isn't running"""
+        if self._socket_dir is None:
+            self._socket_dir = tempfile.mkdtemp(prefix="gongle_rust_")
+            self._socket_path = os.path.join(self._socket_dir, "daemon.sock")
+        if self._daemon is None or self._daemon.poll() is not None:
+            self._daemon = subprocess.Popen(
+                [self.rust_binary, "serve", "--socket", self._socket_path],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL
+            )
+        
+        for _ in range(_CONNECT_ATTEMPTS):
+            try:
+                return await asyncio.open_unix_connection(self._socket_path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if self._daemon.poll() is not None:
+                    # Exited before listening (e.g. a binary without `serve`); stop trying
+                    self._daemon_broken = True
+                    raise ConnectionError(f"Rust daemon exited with code {self._daemon.returncode}")
+                await asyncio.sleep(0.05)  # Still binding the socket
+        raise ConnectionError(f"Rust daemon is not listening on {self._socket_path}")
+    
+    async def _encrypt_spawned(self, request: Dict) -> Dict:
+        """Fallback without the daemon: run the request on an encrypt-stream worker thread"""
+        if self._stream_pool is None:
+            self._stream_pool = ThreadPoolExecutor(
+                max_workers=_STREAM_WORKERS, thread_name_prefix="gongle-encrypt-stream"
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            self._stream_pool, self._encrypt_on_stream, request
+        )
+    
+    def _encrypt_on_stream(self, request: Dict) -> Dict:
+        """Send one request through this thread's encrypt-stream child, starting it if needed"""
+        process = getattr(self._stream_local, "process", None)
+        if process is None or process.poll() is not None:
+            if process is not None:
+                self._stream_children.remove(process)
+            # Plain blocking pipes: the child outlives the call, so there's no
+            # per-call spawn or event loop pipe setup to pay for
+            process = subprocess.Popen(
+                [self.rust_binary, "encrypt-stream"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE
+            )
+            self._stream_local.process = process
+            self._stream_children.append(process)
+        
+        try:
+            process.stdin.write(_frame(msgpack.packb(request)))
+            process.stdin.flush()
+            header = process.stdout.read(_FRAME_HEADER.size)
+            if len(header) == _FRAME_HEADER.size:
+                (length,) = _FRAME_HEADER.unpack(header)
+                body = process.stdout.read(length)
+                if len(body) == length:
+                    return msgpack.unpackb(body)
+        except OSError:
+            pass
+        
+        # Died mid-request; the next call on this thread starts a fresh child
+        process.kill()
+        self._stream_local.process = None
+        if process in self._stream_children:
+            self._stream_children.remove(process)
+        raise RuntimeError(f"Encryption failed: encrypt-stream exited with code {process.wait()}")
+    
+    @staticmethod
+    def _generate_theatrical_password(user_id: int, level: str) -> str:
+        """Derive the password for a user and level (the hints stay theatrical)"""
+        h = hashlib.blake2b(key=_PASSWORD_KEY, digest_size=16)
+        h.update(user_id.to_bytes(8, "little"))
+        h.update(level.encode())
+        return h.hexdigest()
+    
+    @staticmethod
+    def _get_theatrical_elements(level: str) -> Tuple[str, ...]:
         """Get theatrical elements for each level"""
-        elements = {
-            "basic": [
-                "Applied ROT13 (just kidding)",
-                "Added blockchain dust",
-                "Sprinkled with cyber-salt"
-            ],
-            "premium": [
-                "Double-encrypted for safety",
-                "Blessed by cyber-monks",
-                "Wrapped in digital silk",
-                "Premium particles added"
-            ],
-            "paranoid": [
-                "Wrapped in digital tin foil",
-                "Hidden from government satellites",
-                "5G-proof coating applied",
-                "Illuminati-resistant layer added",
-                "Birds aren't real protection enabled"
-            ],
-            "tinfoil": [
-                "Compressed with anxiety",
-                "Encrypted with conspiracy theories",
-                "Chemtrail-resistant layer added",
-                "Flat-earth approved encryption",
-                "Lizard people can't read this"
-            ],
-            "quantum": [
-                "Quantum entangled with parallel universe",
-                "Schrödinger's encryption applied",
-                "Observed by quantum cats",
-                "Superposition achieved",
-                "Heisenberg would be uncertain"
-            ],
-            "alien": [
-                "Applied Area 51 technology",
-                "Translated to alien language",
-                "UFO cloaking activated",
-                "Crop circle pattern applied",
-                "Roswell-grade protection"
-            ],
-            "eldritch": [
-                "C̸͎̈ť̶̰h̷̺̎u̸̮̇l̴̰̈h̴̬̆ṳ̶̈ ̷͇̈́f̸̱̈h̶̺̄t̶̜̔ä̶́ͅg̷̱̈ñ̶̬",
-                "Reality.exe has stopped responding",
-                "S̵̱̈́a̷̤̐n̶̜̈́i̷̦̇t̸̰̄y̷̺̌ ̸̜̇c̸̣̈h̶̰̄ë̶́ͅc̷̱̈k̸̜̇ ̷̤̈f̶̰̄ä̶́ͅi̷̦̇ḷ̸̈ë̶́ͅď̷̺",
-                "Tentacles deployed",
-                "Non-Euclidean geometry applied"
-            ]
-        }
-        return elements.get(level, ["Magic happened"])
+        return _THEATRICAL_ELEMENTS.get(level, _DEFAULT_ELEMENTS)
     
-    def _get_password_hint(self, level: str) -> str:
+    @staticmethod
+    def _get_password_hint(level: str) -> str:
         """Get password hint for each level"""
-        hints = {
-            "basic": "It's literally 'password123' with your user ID",
-            "premium": "Same as basic but with an exclamation mark!",
-            "paranoid": "They. Are. Watching. (with underscores)",
-            "tinfoil": "5G can't penetrate this password",
-            "quantum": "The cat knows the password (or doesn't)",
-            "alien": "Check your Area 51 clearance badge",
-            "eldritch": "Ph'nglui mglw'nafh... you know the rest"
-        }
-        return hints.get(level, "The password is hidden in plain sight")
+        return _PASSWORD_HINTS.get(level, "The password is hidden in plain sight")
     
-    def _get_theatrical_time(self, level: str) -> int:
+    @staticmethod
+    def _get_theatrical_time(level: str) -> int:
         """Get theatrical encryption time in milliseconds"""
-        import random
-        base_times = {
-            "basic": 100,
-            "premium": 500,
-            "paranoid": 1000,
-            "tinfoil": 2000,
-            "quantum": 3000,
-            "alien": 4000,
-            "eldritch": 6666
-        }
-        base = base_times.get(level, 1000)
-        # Add some randomness for realism
-        return base + random.randint(-base//4, base//4)
+        base = _BASE_TIMES.get(level, 1000)
+        # Add up to +/-25% of randomness for realism
+        return base + base * _JITTER[random.getrandbits(8)] // 1000 // 4
     
-    def _get_shred_message(self, shred_type: str) -> str:
+    @staticmethod
+    def _get_shred_message(shred_type: str) -> str:
         """Get shredding complete message"""
-        messages = {
-            "standard": "Data overwritten with cat videos",
-            "military": "Data destroyed with military precision",
-            "nuclear": "Data atomized at the molecular level",
-            "blackhole": "Data consumed by artificial black hole"
-        }
-        return messages.get(shred_type, "Data has been shredded")
+        return _SHRED_MESSAGES.get(shred_type, "Data has been shredded")
     
     def cleanup(self):
-        """Clean up temporary directory"""
-        import shutil
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+        """Stop the Rust daemon and encrypt-stream workers, and remove the socket and its directory"""
+        if self._stream_pool is not None:
+            # Don't wait on the workers: one stuck on a wedged child would hang
+            # exit, and stopping the children below unblocks them anyway
+            self._stream_pool.shutdown(wait=False, cancel_futures=True)
+            self._stream_pool = None
+        children, self._stream_children = self._stream_children, []
+        for process in children:
+            # Closing stdin ends encrypt-stream's read loop
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            self._stop_child(process)
+        with self._io_loop_lock:
+            loop, self._io_loop = self._io_loop, None
+        if loop is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_connection(), loop).result(timeout=1)
+            except Exception as e:  # Already wedged; the daemon is stopped below anyway
+                logger.warning(f"Could not close the Rust daemon connection: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            self._conn_lock = self._in_flight = None
+        if self._daemon is not None:
+            if self._daemon.poll() is None:
+                self._daemon.terminate()
+                self._stop_child(self._daemon)
+            self._daemon = None
+        if self._socket_dir is not None:
+            try:
+                os.unlink(self._socket_path)
+            except FileNotFoundError:
+                pass
+            try:
+                os.rmdir(self._socket_dir)
+            except OSError as e:
+                logger.warning(f"Could not remove the Rust daemon's socket directory: {e}")
+            self._socket_dir = self._socket_path = None
+    
+    @staticmethod
+    def _stop_child(process: subprocess.Popen):
+        """Wait for a child that has been asked to exit, killing it if it doesn't"""
+        try:
+            process.wait(timeout=_STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Rust child {process.pid} did not exit in {_STOP_TIMEOUT}s; killing it")
+            process.kill()
+            process.wait()
 
 
 # Singleton instance
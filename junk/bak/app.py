@@ -1,15 +1,53 @@
 from flask import Flask, jsonify, request, session, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import os
 from datetime import datetime, timedelta
-import traceback
+import logging
+import orjson
+from types import MappingProxyType
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify() and request.json"""
+
+    def dumps(self, obj, **kwargs):
+        # Sorted keys to match Flask's default output
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_SORT_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__, static_folder='static')
+app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = 'your-secret-key'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///gongle.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 db = SQLAlchemy(app)
+logger = logging.getLogger(__name__)
+
+def _set_sqlite_pragmas(dbapi_conn, connection_record):
+    """Tune each new SQLite connection for our write-heavy endpoints"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")      # Readers don't block the writer
+    cursor.execute("PRAGMA synchronous=NORMAL")    # fsync at checkpoints, not every commit
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")   # 256 MB
+    cursor.close()
+
+with app.app_context():
+    event.listen(db.engine, 'connect', _set_sqlite_pragmas)
+
+# Points paid per data type in sell_data
+_POINTS_MAP = MappingProxyType({
+    'ip_address': 10, 'browser': 5, 'location': 20, 'favorite_food': 60, 'favorite_movie': 70,
+    'phone_number': 100, 'twitter_handle': 80, 'instagram_username': 85,
+    'credit_card_last4': 200, 'medical_conditions': 500, 'week_location': 500,
+    'ssn_full': 10000, 'dna_results': 1000, 'bank_account': 3000
+})
 
 # Models
 class User(db.Model):
@@ -20,6 +58,10 @@ class User(db.Model):
     last_login = db.Column(db.DateTime)
 
 class DataSold(db.Model):
+    __table_args__ = (
+        db.Index('uq_datasold_user_type', 'user_id', 'data_type', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     data_type = db.Column(db.String(50))
@@ -27,6 +69,10 @@ class DataSold(db.Model):
     points = db.Column(db.Integer)
 
 class Bonus(db.Model):
+    __table_args__ = (
+        db.Index('uq_bonus_user_page', 'user_id', 'page', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     page = db.Column(db.String(50))
@@ -36,6 +82,15 @@ class Bonus(db.Model):
 try:
     with app.app_context():
         db.create_all()
+
+        # create_all() skips existing tables, so add any indexes an older
+        # database file is missing; the ON CONFLICT inserts need the unique ones
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(bind=db.engine, checkfirst=True)
+                except IntegrityError as e:
+                    print(f"Could not create index {index.name} (duplicate rows?): {e.orig}")
         print("Database tables created successfully")
 except Exception as e:
     print(f"Error creating database: {str(e)}")
@@ -60,22 +115,21 @@ def create_account():
             session['user_id'] = user.id
             return jsonify({'success': True, 'message': 'Logged in'})
 
+        # One transaction for the user and their email sale; flush assigns new_user.id
         new_user = User(email=email, points=0, current_page=1)
         db.session.add(new_user)
+        db.session.flush()
+        db.session.add(DataSold(user_id=new_user.id, data_type='email', data_value=email, points=50))
+        new_user.points += 50
         db.session.commit()
         print(f"Created new user with email: {email}")
+        print("Awarded 50 points for email")
 
         session['user_id'] = new_user.id
-        data_sold = DataSold(user_id=new_user.id, data_type='email', data_value=email, points=50)
-        new_user.points += 50
-        db.session.add(data_sold)
-        db.session.commit()
-        print("Awarded 50 points for email")
 
         return jsonify({'success': True, 'message': 'Account created'})
     except Exception as e:
-        print(f"Error in create_account: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in create_account")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/sell', methods=['POST'])
@@ -88,29 +142,28 @@ def sell_data():
         type = data.get('type')
         value = data.get('value')
 
-        if DataSold.query.filter_by(user_id=user_id, data_type=type).first():
-            return jsonify({'error': 'You already sold that, greedy!'}), 400
-
-        points_map = {
-            'ip_address': 10, 'browser': 5, 'location': 20, 'favorite_food': 60, 'favorite_movie': 70,
-            'phone_number': 100, 'twitter_handle': 80, 'instagram_username': 85,
-            'credit_card_last4': 200, 'medical_conditions': 500, 'week_location': 500,
-            'ssn_full': 10000, 'dna_results': 1000, 'bank_account': 3000
-        }
-
         if type == 'ip_address':
             value = request.remote_addr
 
-        data_sold = DataSold(user_id=user_id, data_type=type, data_value=value, points=points_map.get(type, 0))
-        user = User.query.get(user_id)
-        user.points += points_map.get(type, 0)
-        db.session.add(data_sold)
+        pts = _POINTS_MAP.get(type, 0)
+        user = db.session.get(User, user_id)
+
+        # The unique constraint does the "already sold" check as part of the insert
+        row = db.session.execute(
+            sqlite_insert(DataSold)
+            .values(user_id=user_id, data_type=type, data_value=value, points=pts)
+            .on_conflict_do_nothing(index_elements=['user_id', 'data_type'])
+            .returning(DataSold.id)
+        ).first()
+        if row is None:
+            return jsonify({'error': 'You already sold that, greedy!'}), 400
+
+        user.points += pts
         db.session.commit()
 
         return jsonify({'success': True, 'points': user.points})
     except Exception as e:
-        print(f"Error in sell_data: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in sell_data")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/claim_bonus', methods=['POST'])
@@ -123,21 +176,24 @@ def claim_bonus():
         page = data.get('page')
         points = data.get('points')
 
-        if Bonus.query.filter_by(user_id=user_id, page=page).first():
+        row = db.session.execute(
+            sqlite_insert(Bonus)
+            .values(user_id=user_id, page=page, points=points)
+            .on_conflict_do_nothing(index_elements=['user_id', 'page'])
+            .returning(Bonus.id)
+        ).first()
+        if row is None:
             return jsonify({'error': 'Bonus already claimed'}), 400
 
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         user.points += points
         if page != 'page4':
             user.current_page += 1
-        bonus = Bonus(user_id=user_id, page=page, points=points)
-        db.session.add(bonus)
         db.session.commit()
 
         return jsonify({'success': True, 'points': user.points})
     except Exception as e:
-        print(f"Error in claim_bonus: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in claim_bonus")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/daily_bonus', methods=['POST'])
@@ -146,7 +202,7 @@ def daily_bonus():
         if 'user_id' not in session:
             return jsonify({'error': 'Not logged in'}), 401
         user_id = session['user_id']
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         now = datetime.utcnow()
 
         if user.last_login and (now - user.last_login).days < 1:
@@ -162,8 +218,7 @@ def daily_bonus():
         db.session.commit()
         return jsonify({'success': True, 'points': user.points, 'points_added': 100})
     except Exception as e:
-        print(f"Error in daily_bonus: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in daily_bonus")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/leaderboard')
@@ -172,8 +227,7 @@ def leaderboard():
         users = User.query.order_by(User.points.desc()).limit(10).all()
         return jsonify([{'name': u.email, 'points': u.points} for u in users])
     except Exception as e:
-        print(f"Error in leaderboard: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in leaderboard")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 if __name__ == '__main__':
@@ -1,17 +1,85 @@
 from flask import Flask, jsonify, request, session, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import os
 from datetime import datetime, timedelta
-import traceback
+import logging
+import orjson
 import random
 import time
+from types import MappingProxyType
+from collections import defaultdict
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify() and request.json"""
+
+    def dumps(self, obj, **kwargs):
+        # Sorted keys to match Flask's default output
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_SORT_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__, static_folder='static')
+app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = 'your-secret-key'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///gongle.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 db = SQLAlchemy(app)
+logger = logging.getLogger(__name__)
+
+def _set_sqlite_pragmas(dbapi_conn, connection_record):
+    """Tune each new SQLite connection for our write-heavy endpoints"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")      # Readers don't block the writer
+    cursor.execute("PRAGMA synchronous=NORMAL")    # fsync at checkpoints, not every commit
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")   # 256 MB
+    cursor.close()
+
+with app.app_context():
+    event.listen(db.engine, 'connect', _set_sqlite_pragmas)
+
+# Points paid per data type in sell_data
+_POINTS_MAP = MappingProxyType({
+    'ip_address': 10, 'browser': 5, 'location': 20, 'favorite_food': 60, 'favorite_movie': 70,
+    'phone_number': 100, 'twitter_handle': 80, 'instagram_username': 85,
+    'credit_card_last4': 200, 'medical_conditions': 500, 'week_location': 500,
+    'ssn_full': 10000, 'dna_results': 1000, 'bank_account': 3000,
+    'first_pet': 2000, 'mothers_maiden': 2500, 'street_grew_up': 3000,
+    'childhood_friend': 3500, 'mothers_birthday': 4000, 'favorite_teacher': 4500,
+    'city_born': 5000, 'mothers_city_born': 5000,
+    'facebook_name': 1000, 'youtube_channel': 1000, 'fb_messenger': 1200,
+    'whatsapp': 1200, 'telegram': 1200, 'tiktok': 1500, 'discord': 1500,
+    'gender': 50, 'marital_status': 75, 'occupation': 100, 'education_level': 75,
+    'nationality': 50, 'passport_number': 500, 'driver_license_number': 500,
+    'reddit': 100, 'linkedin': 120, 'snapchat': 80,
+    'full_credit_card_number': 5000, 'credit_card_expiry_date': 2500, 'credit_card_cvv': 7500,
+    'bank_account_sort_code': 3500, 'paypal_email': 150, 'crypto_wallet_address': 300,
+    'annual_income': 250, 'credit_score': 500, 'investment_portfolio': 1000,
+    'favorite_book': 70, 'hobbies': 80, 'political_affiliation': 1850,
+    'religious_beliefs': 1650, 'sexual_orientation': 2000, 'dating_preferences': 750,
+    'shopping_habits': 100, 'travel_history': 200,
+    'blood_type': 400, 'allergies': 350, 'insurance_provider': 150,
+    'prescription_medications': 450, 'vaccination_records': 300,
+    'mental_health_history': 4000, 'home_location': 500, 'work_location': 2500,
+    'favorite_hangout_spots': 250, 'travel_destinations': 100,
+    'favorite_childhood_memory': 50, 'pet_name': 50, 'favorite_sport': 50,
+    'favorite_date_activity': 50, 'favorite_school_subject': 50,
+    'favorite_sex_position': 1000, 'favorite_jolly_rancher_color': 1000,
+    'current_video_game_addiction': 1000
+})
+
+# Data types shown as socials on the leaderboard
+_SOCIAL_TYPES = frozenset([
+    'twitter_handle', 'instagram_username', 'facebook_name', 'youtube_channel',
+    'fb_messenger', 'whatsapp', 'telegram', 'tiktok', 'discord', 'reddit',
+    'linkedin', 'snapchat'
+])
 
 # Models
 class User(db.Model):
@@ -22,6 +90,18 @@ class User(db.Model):
     last_login = db.Column(db.DateTime)
 
 class DataSold(db.Model):
+    __table_args__ = (
+        db.Index('ix_datasold_user_type', 'user_id', 'data_type'),
+        # Each type sells once per user; the per-destination travel rows are the
+        # one type a user can have many of, so they are left out. (SQLite only
+        # uses a partial index when the query repeats its WHERE, hence the
+        # plain index above for lookups.)
+        db.Index(
+            'uq_datasold_user_type', 'user_id', 'data_type', unique=True,
+            sqlite_where=db.text("data_type != 'travel_destination'")
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     data_type = db.Column(db.String(50))
@@ -29,6 +109,10 @@ class DataSold(db.Model):
     points = db.Column(db.Integer)
 
 class Bonus(db.Model):
+    __table_args__ = (
+        db.Index('uq_bonus_user_page', 'user_id', 'page', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     page = db.Column(db.String(50))
@@ -45,6 +129,26 @@ class SessionData(db.Model):
 try:
     with app.app_context():
         db.create_all()
+
+        # Databases from before the extra travel rows got their own type hold
+        # several 'travel_destinations' rows per user; keep the first (the sale
+        # itself) and retype the rest so the unique index below can be built
+        db.session.execute(text("""
+            UPDATE data_sold SET data_type = 'travel_destination'
+            WHERE data_type = 'travel_destinations' AND id NOT IN (
+                SELECT MIN(id) FROM data_sold WHERE data_type = 'travel_destinations' GROUP BY user_id
+            )
+        """))
+        db.session.commit()
+
+        # create_all() skips existing tables, so add any indexes an older
+        # database file is missing; the ON CONFLICT inserts need the unique ones
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(bind=db.engine, checkfirst=True)
+                except IntegrityError as e:
+                    print(f"Could not create index {index.name} (duplicate rows?): {e.orig}")
         print("Database tables created successfully")
 except Exception as e:
     print(f"Error creating database: {str(e)}")
@@ -69,22 +173,21 @@ def create_account():
             session['user_id'] = user.id
             return jsonify({'success': True, 'message': 'Logged in', 'current_page': user.current_page})
 
+        # One transaction for the user and their email sale; flush assigns new_user.id
         new_user = User(email=email, points=0, current_page=1)
         db.session.add(new_user)
+        db.session.flush()
+        db.session.add(DataSold(user_id=new_user.id, data_type='email', data_value=email, points=50))
+        new_user.points += 50
         db.session.commit()
         print(f"Created new user with email: {email}")
+        print("Awarded 50 points for email")
 
         session['user_id'] = new_user.id
-        data_sold = DataSold(user_id=new_user.id, data_type='email', data_value=email, points=50)
-        new_user.points += 50
-        db.session.add(data_sold)
-        db.session.commit()
-        print("Awarded 50 points for email")
 
         return jsonify({'success': True, 'message': 'Account created', 'current_page': new_user.current_page})
     except Exception as e:
-        print(f"Error in create_account: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in create_account")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/sell', methods=['POST'])
@@ -97,63 +200,46 @@ def sell_data():
         type = data.get('type')
         value = data.get('value')
 
-        if DataSold.query.filter_by(user_id=user_id, data_type=type).first():
-            return jsonify({'error': 'You already sold that, greedy!'}), 400
-
-        points_map = {
-            'ip_address': 10, 'browser': 5, 'location': 20, 'favorite_food': 60, 'favorite_movie': 70,
-            'phone_number': 100, 'twitter_handle': 80, 'instagram_username': 85,
-            'credit_card_last4': 200, 'medical_conditions': 500, 'week_location': 500,
-            'ssn_full': 10000, 'dna_results': 1000, 'bank_account': 3000,
-            'first_pet': 2000, 'mothers_maiden': 2500, 'street_grew_up': 3000,
-            'childhood_friend': 3500, 'mothers_birthday': 4000, 'favorite_teacher': 4500,
-            'city_born': 5000, 'mothers_city_born': 5000,
-            'facebook_name': 1000, 'youtube_channel': 1000, 'fb_messenger': 1200,
-            'whatsapp': 1200, 'telegram': 1200, 'tiktok': 1500, 'discord': 1500,
-            'gender': 50, 'marital_status': 75, 'occupation': 100, 'education_level': 75,
-            'nationality': 50, 'passport_number': 500, 'driver_license_number': 500,
-            'reddit': 100, 'linkedin': 120, 'snapchat': 80,
-            'full_credit_card_number': 5000, 'credit_card_expiry_date': 2500, 'credit_card_cvv': 7500,
-            'bank_account_sort_code': 3500, 'paypal_email': 150, 'crypto_wallet_address': 300,
-            'annual_income': 250, 'credit_score': 500, 'investment_portfolio': 1000,
-            'favorite_book': 70, 'hobbies': 80, 'political_affiliation': 1850,
-            'religious_beliefs': 1650, 'sexual_orientation': 2000, 'dating_preferences': 750,
-            'shopping_habits': 100, 'travel_history': 200,
-            'blood_type': 400, 'allergies': 350, 'insurance_provider': 150,
-            'prescription_medications': 450, 'vaccination_records': 300,
-            'mental_health_history': 4000, 'home_location': 500, 'work_location': 2500,
-            'favorite_hangout_spots': 250, 'travel_destinations': 100,
-            'favorite_childhood_memory': 50, 'pet_name': 50, 'favorite_sport': 50,
-            'favorite_date_activity': 50, 'favorite_school_subject': 50,
-            'favorite_sex_position': 1000, 'favorite_jolly_rancher_color': 1000,
-            'current_video_game_addiction': 1000
-        }
-
         if type == 'ip_address':
             value = request.remote_addr
 
-        data_sold = DataSold(user_id=user_id, data_type=type, data_value=value, points=points_map.get(type, 0))
-        user = User.query.get(user_id)
-        user.points += points_map.get(type, 0)
-        db.session.add(data_sold)
+        pts = _POINTS_MAP.get(type, 0)
+        user = db.session.get(User, user_id)
+
+        # The unique constraint does the "already sold" check as part of the insert
+        row = db.session.execute(
+            sqlite_insert(DataSold)
+            .values(user_id=user_id, data_type=type, data_value=value, points=pts)
+            .on_conflict_do_nothing(
+                index_elements=['user_id', 'data_type'],
+                index_where=db.text("data_type != 'travel_destination'")
+            )
+            .returning(DataSold.id)
+        ).first()
+        if row is None:
+            return jsonify({'error': 'You already sold that, greedy!'}), 400
+
+        user.points += pts
         db.session.commit()
 
         # Handle travel_destinations as a list
         if type == 'travel_destinations':
             try:
-                destinations = value.split(',')
-                user.points += points_map.get(type, 0) * len(destinations)
-                for dest in destinations:
-                    if dest.strip():
-                        db.session.add(DataSold(user_id=user_id, data_type=type, data_value=dest.strip(), points=100))
-                db.session.commit()
+                rows = [
+                    {'user_id': user_id, 'data_type': 'travel_destination', 'data_value': dest.strip(), 'points': 100}
+                    for dest in value.split(',') if dest.strip()
+                ]
+                if rows:
+                    # One executemany INSERT rather than a flush per destination
+                    user.points += 100 * len(rows)
+                    db.session.execute(DataSold.__table__.insert(), rows)
+                    db.session.commit()
             except:
                 pass
 
         return jsonify({'success': True, 'points': user.points})
     except Exception as e:
-        print(f"Error in sell_data: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in sell_data")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/claim_bonus', methods=['POST'])
@@ -166,21 +252,24 @@ def claim_bonus():
         page = data.get('page')
         points = data.get('points')
 
-        if Bonus.query.filter_by(user_id=user_id, page=page).first():
+        row = db.session.execute(
+            sqlite_insert(Bonus)
+            .values(user_id=user_id, page=page, points=points)
+            .on_conflict_do_nothing(index_elements=['user_id', 'page'])
+            .returning(Bonus.id)
+        ).first()
+        if row is None:
             return jsonify({'error': 'Bonus already claimed'}), 400
 
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         user.points += points
         if page != 'page6':  # Updated to handle Page 6
             user.current_page += 1
-        bonus = Bonus(user_id=user_id, page=page, points=points)
-        db.session.add(bonus)
         db.session.commit()
 
         return jsonify({'success': True, 'points': user.points})
     except Exception as e:
-        print(f"Error in claim_bonus: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in claim_bonus")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/social_bonus', methods=['POST'])
@@ -193,14 +282,13 @@ def social_bonus():
         page = data.get('page')
         points = data.get('points')
 
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         user.points += points
         db.session.commit()
 
         return jsonify({'success': True, 'points': user.points})
     except Exception as e:
-        print(f"Error in social_bonus: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in social_bonus")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/daily_bonus', methods=['POST'])
@@ -209,7 +297,7 @@ def daily_bonus():
         if 'user_id' not in session:
             return jsonify({'error': 'Not logged in'}), 401
         user_id = session['user_id']
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         now = datetime.utcnow()
 
         if user.last_login and (now - user.last_login).days < 1:
@@ -225,8 +313,7 @@ def daily_bonus():
         db.session.commit()
         return jsonify({'success': True, 'points': user.points, 'points_added': 100})
     except Exception as e:
-        print(f"Error in daily_bonus: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in daily_bonus")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/session_data', methods=['POST'])
@@ -245,26 +332,25 @@ def session_data():
 
         return jsonify({'success': True})
     except Exception as e:
-        print(f"Error in session_data: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in session_data")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/leaderboard')
 def leaderboard():
     try:
         users = User.query.order_by(User.points.desc()).limit(10).all()
-        result = []
-        social_types = [
-            'twitter_handle', 'instagram_username', 'facebook_name', 'youtube_channel',
-            'fb_messenger', 'whatsapp', 'telegram', 'tiktok', 'discord', 'reddit',
-            'linkedin', 'snapchat'
-        ]
-        for user in users:
-            socials = {}
-            for data in DataSold.query.filter_by(user_id=user.id).all():
-                if data.data_type in social_types:
-                    socials[data.data_type] = data.data_value
-            result.append({'name': user.email, 'points': user.points, 'socials': socials})
+
+        # Socials for all top users in one query instead of one per user
+        socials_by_user = defaultdict(dict)
+        rows = db.session.execute(
+            select(DataSold.user_id, DataSold.data_type, DataSold.data_value).where(
+                DataSold.user_id.in_([u.id for u in users]),
+                DataSold.data_type.in_(_SOCIAL_TYPES)
+            )
+        ).all()
+        for user_id, data_type, data_value in rows:
+            socials_by_user[user_id][data_type] = data_value
+        result = [{'name': u.email, 'points': u.points, 'socials': socials_by_user[u.id]} for u in users]
 
         # Add fake bot users
         bot_names = ['BotMaster3000', 'DataHoarderX', 'PointKing999', 'ShadowCollector']
@@ -273,8 +359,7 @@ def leaderboard():
 
         return jsonify(sorted(result, key=lambda x: x['points'], reverse=True)[:10])
     except Exception as e:
-        print(f"Error in leaderboard: {str(e)}")
-        print(traceback.format_exc())
+        logger.exception("Error in leaderboard")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 if __name__ == '__main__':
@@ -1,17 +1,38 @@
+import os
 import sys
-sys.path.insert(0, '/app/gongle-web')
 
-print("Testing database configuration...")
+import pytest
 
-try:
+GONGLE_WEB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gongle-web')
+
+
+@pytest.fixture(scope="session")
+def flask_app(tmp_path_factory):
+    """Import the app (and create its tables) only when a test asks for it
+
+    HOME and the database point into a temporary directory first, so the app
+    never touches the real database or leaves its path cache in ~.
+    """
+    home = tmp_path_factory.mktemp("home")
+    saved = {key: os.environ.get(key) for key in ("HOME", "GONGLE_DB_PATH")}
+    os.environ["HOME"] = str(home)
+    os.environ["GONGLE_DB_PATH"] = str(home / "gongle.db")
+    if GONGLE_WEB not in sys.path:
+        sys.path.insert(0, GONGLE_WEB)
     from app import app
-    print(f"Database URI: {app.config.get('SQLALCHEMY_DATABASE_URI', 'NOT SET')}")
-    print(f"All config keys: {list(app.config.keys())}")
-except Exception as e:
-    print(f"Error importing app: {e}")
+    yield app
+
+    for key, value in saved.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+
+
+def test_db_uri(flask_app):
+    assert flask_app.config.get('SQLALCHEMY_DATABASE_URI')
+
 
-try:
+def test_db_importable(flask_app):
     from app import db
-    print("Database object imported successfully")
-except Exception as e:
-    print(f"Error importing db: {e}")
+    assert db is not None
@@ -12,7 +12,7 @@ use rand::{rngs::OsRng, RngCore};
 use serde::{Deserialize, Serialize};
 use std::{
     fs,
-    io::{Read, Write},
+    io::Read,
     path::Path,
 };
 use thiserror::Error;
@@ -114,21 +114,37 @@ pub fn encrypt_file<P: AsRef<Path>>(
         .with_context(|| format!("Failed to read file: {}", input_path.as_ref().display()))?;
     
     // Get password either from parameter or by prompting
-    let password = match password {
+    let mut password = match password {
         Some(pwd) => pwd,
         None => get_password(true)?,
     };
     
+    let encrypted = encrypt_bytes(&file_content, &password)?;
+    
+    fs::write(&output_path, &encrypted)
+        .with_context(|| format!("Failed to create output file: {}", output_path.as_ref().display()))?;
+    
+    // Zeroize sensitive data
+    password.zeroize();
+    file_content.zeroize();
+    
+    Ok(())
+}
+
+/// Encrypts a buffer into the same container format as `encrypt_file`:
+/// header length (4 bytes, little-endian) + JSON header + ciphertext
+pub fn encrypt_bytes(plaintext: &[u8], password: &str) -> Result<Vec<u8>> {
     // Generate a random salt
     let mut salt = vec![0u8; SALT_LENGTH];
     OsRng.fill_bytes(&mut salt);
     
     // Derive encryption key
-    let key = derive_key(&password, &salt)
+    let mut key = derive_key(password, &salt)
         .context("Failed to derive encryption key")?;
     
     // Create cipher
     let cipher = ChaCha20Poly1305::new(&key.into());
+    key.zeroize();
     
     // Generate a random nonce
     let mut nonce_bytes = [0u8; NONCE_LENGTH];
@@ -137,7 +153,7 @@ pub fn encrypt_file<P: AsRef<Path>>(
     
     // Encrypt the data
     let encrypted_data = cipher
-        .encrypt(nonce, file_content.as_ref())
+        .encrypt(nonce, plaintext)
         .map_err(|_| CryptoError::EncryptionError)?;
     
     // Create header with metadata
@@ -151,29 +167,14 @@ pub fn encrypt_file<P: AsRef<Path>>(
     let header_json = serde_json::to_vec(&header)
         .context("Failed to serialize encryption header")?;
     
-    // Write header length (4 bytes) + header + encrypted data
-    let mut output_file = fs::File::create(&output_path)
-        .with_context(|| format!("Failed to create output file: {}", output_path.as_ref().display()))?;
-    
-    // Write header length as 4 bytes in little-endian
+    // Write header length as 4 bytes in little-endian, then header, then data
     let header_len = header_json.len() as u32;
-    output_file.write_all(&header_len.to_le_bytes())
-        .context("Failed to write header length")?;
-    
-    // Write header
-    output_file.write_all(&header_json)
-        .context("Failed to write header")?;
-    
-    // Write encrypted data
-    output_file.write_all(&encrypted_data)
-        .context("Failed to write encrypted data")?;
-    
-    // Zeroize sensitive data
-    let mut password = password;
-    password.zeroize();
-    file_content.zeroize();
+    let mut output = Vec::with_capacity(4 + header_json.len() + encrypted_data.len());
+    output.extend_from_slice(&header_len.to_le_bytes());
+    output.extend_from_slice(&header_json);
+    output.extend_from_slice(&encrypted_data);
     
-    Ok(())
+    Ok(output)
 }
 
 /// Decrypts file content with ChaCha20-Poly1305
@@ -0,0 +1,10 @@
+//! Library half of the crate, so the crypto can be loaded into the Gongle
+//! web app as a Python extension instead of being spawned as a process.
+//!
+//! Build the extension with `maturin develop --release --features python`.
+
+pub mod crypto;
+pub mod secure_delete;
+
+#[cfg(feature = "python")]
+mod python;
@@ -7,6 +7,7 @@ mod config;
 mod crypto;
 mod file_utils;
 mod secure_delete;
+mod stream;
 mod ui;
 
 use crate::config::Config;
@@ -68,6 +69,23 @@ enum Commands {
         /// Path to directory to list encrypted files from
         path: PathBuf,
     },
+
+    /// Securely delete a file (uses --passes)
+    Shred {
+        /// Path to file to shred
+        path: PathBuf,
+    },
+
+    /// Encrypt length-prefixed msgpack requests from stdin to stdout (used by the web bridge)
+    EncryptStream,
+
+    /// Serve encrypt/shred requests on a Unix socket until killed (used by the web bridge)
+    #[cfg(unix)]
+    Serve {
+        /// Path of the Unix socket to listen on
+        #[arg(long, value_name = "PATH")]
+        socket: PathBuf,
+    },
 }
 
 fn main() -> Result<()> {
@@ -133,6 +151,23 @@ fn main() -> Result<()> {
                 println!("  {}", file.display());
             }
         }
+
+        Commands::Shred { path } => {
+            secure_delete::secure_delete_file(path, cli.passes)
+                .context("Failed to shred file")?;
+        }
+
+        Commands::EncryptStream => {
+            // Nothing but frames may go to stdout here
+            stream::run_encrypt_stream()
+                .context("Failed to serve encrypt stream")?;
+        }
+
+        #[cfg(unix)]
+        Commands::Serve { socket } => {
+            stream::run_server(socket)
+                .context("Failed to serve requests")?;
+        }
     }
 
     Ok(())
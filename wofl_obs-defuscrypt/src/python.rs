@@ -0,0 +1,33 @@
+use pyo3::exceptions::PyRuntimeError;
+use pyo3::prelude::*;
+use pyo3::types::PyBytes;
+use std::path::Path;
+
+use crate::crypto::encrypt_bytes;
+use crate::secure_delete::secure_delete_file;
+
+/// Encrypts `data` into the `encrypt_file` container format and returns it as bytes
+///
+/// The GIL is released while the key is derived and the data encrypted.
+#[pyfunction]
+fn encrypt<'py>(py: Python<'py>, data: &[u8], password: &str) -> PyResult<&'py PyBytes> {
+    let encrypted = py
+        .allow_threads(|| encrypt_bytes(data, password))
+        .map_err(|e| PyRuntimeError::new_err(format!("{:#}", e)))?;
+
+    Ok(PyBytes::new(py, &encrypted))
+}
+
+/// Securely deletes the file at `path` with `passes` overwrite passes
+#[pyfunction]
+fn shred(py: Python<'_>, path: &str, passes: u8) -> PyResult<()> {
+    py.allow_threads(|| secure_delete_file(Path::new(path), passes))
+        .map_err(|e| PyRuntimeError::new_err(format!("{:#}", e)))
+}
+
+#[pymodule]
+fn gongle_crypt(_py: Python<'_>, m: &PyModule) -> PyResult<()> {
+    m.add_function(wrap_pyfunction!(encrypt, m)?)?;
+    m.add_function(wrap_pyfunction!(shred, m)?)?;
+    Ok(())
+}
@@ -0,0 +1,288 @@
+use anyhow::{Context, Result};
+use serde::{Deserialize, Serialize};
+use std::io::{self, ErrorKind, Read, Write};
+use std::path::Path;
+use zeroize::Zeroize;
+
+use crate::crypto::encrypt_bytes;
+use crate::secure_delete::secure_delete_file;
+
+// Largest frame we accept, so a bad length prefix can't make us allocate gigabytes
+const MAX_FRAME_LEN: usize = 64 * 1024 * 1024;
+
+/// One request from the Python bridge, tagged by its `op` field
+#[derive(Debug, Deserialize)]
+#[serde(tag = "op", rename_all = "lowercase")]
+pub enum Request {
+    /// Encrypt `data` into the `encrypt_file` container format
+    Encrypt {
+        #[serde(with = "serde_bytes")]
+        data: Vec<u8>,
+        password: String,
+    },
+
+    /// Securely delete the file at `path`
+    Shred {
+        path: String,
+        passes: u8,
+    },
+}
+
+/// The `id` a client puts next to a request so it can match up the reply
+///
+/// Parsed separately from `Request` so a malformed request still gets its id
+/// back; requests without one (the stdio stream) use 0.
+#[derive(Debug, Default, Deserialize)]
+struct RequestId {
+    #[serde(default)]
+    id: u32,
+}
+
+/// Reply to a `Request`; `data` is empty for shreds and when `error` is set
+#[derive(Debug, Serialize)]
+pub struct Response {
+    pub id: u32,
+    pub ok: bool,
+    #[serde(with = "serde_bytes")]
+    pub data: Vec<u8>,
+    pub error: Option<String>,
+}
+
+impl Response {
+    fn from_result(id: u32, result: Result<Vec<u8>>) -> Self {
+        match result {
+            Ok(data) => Self { id, ok: true, data, error: None },
+            Err(e) => Self { id, ok: false, data: Vec::new(), error: Some(format!("{:#}", e)) },
+        }
+    }
+}
+
+/// Reads one length-prefixed frame; `Ok(None)` on a clean EOF between frames
+pub fn read_frame<R: Read>(reader: &mut R) -> Result<Option<Vec<u8>>> {
+    let mut len_bytes = [0u8; 4];
+    match reader.read_exact(&mut len_bytes) {
+        Ok(()) => {}
+        Err(e) if e.kind() == ErrorKind::UnexpectedEof => return Ok(None),
+        Err(e) => return Err(e).context("Failed to read frame length"),
+    }
+
+    let len = u32::from_be_bytes(len_bytes) as usize;
+    if len > MAX_FRAME_LEN {
+        anyhow::bail!("Frame of {} bytes exceeds the {} byte limit", len, MAX_FRAME_LEN);
+    }
+
+    let mut frame = vec![0u8; len];
+    reader.read_exact(&mut frame)
+        .context("Failed to read frame body")?;
+
+    Ok(Some(frame))
+}
+
+/// Writes one length-prefixed frame and flushes it
+pub fn write_frame<W: Write>(writer: &mut W, payload: &[u8]) -> Result<()> {
+    let len = payload.len() as u32;
+    writer.write_all(&len.to_be_bytes())
+        .context("Failed to write frame length")?;
+    writer.write_all(payload)
+        .context("Failed to write frame body")?;
+    writer.flush()
+        .context("Failed to flush frame")?;
+
+    Ok(())
+}
+
+/// Handles one encoded request and returns the encoded response
+///
+/// Bad requests and failed operations are reported in the response so the
+/// caller's stream stays usable; only failing to encode the reply is an error.
+/// `allow_shred` is false on stdio, where shredding's progress output would
+/// end up in the middle of the response stream.
+pub fn handle_frame(frame: &[u8], allow_shred: bool) -> Result<Vec<u8>> {
+    let RequestId { id } = rmp_serde::from_slice(frame).unwrap_or_default();
+
+    let result = match rmp_serde::from_slice::<Request>(frame) {
+        Ok(Request::Encrypt { mut data, mut password }) => {
+            let result = encrypt_bytes(&data, &password);
+
+            // Zeroize sensitive data
+            password.zeroize();
+            data.zeroize();
+
+            result
+        }
+        Ok(Request::Shred { path, passes }) if allow_shred => {
+            secure_delete_file(Path::new(&path), passes).map(|()| Vec::new())
+        }
+        Ok(Request::Shred { .. }) => Err(anyhow::anyhow!("Shred is only available from `serve`")),
+        Err(e) => Err(anyhow::Error::new(e).context("Malformed request")),
+    };
+
+    rmp_serde::to_vec_named(&Response::from_result(id, result))
+        .context("Failed to encode response")
+}
+
+/// Serves encrypt requests on stdin/stdout until stdin is closed
+///
+/// Each request and response is a msgpack map behind a 4-byte big-endian
+/// length prefix, so one process can answer any number of requests.
+pub fn run_encrypt_stream() -> Result<()> {
+    let stdin = io::stdin();
+    let stdout = io::stdout();
+    let mut reader = stdin.lock();
+    let mut writer = stdout.lock();
+
+    while let Some(frame) = read_frame(&mut reader)? {
+        let response = handle_frame(&frame, false)?;
+        write_frame(&mut writer, &response)?;
+    }
+
+    Ok(())
+}
+
+/// Serves requests on a Unix socket until killed, one thread per connection
+///
+/// Connections speak the same framing as `run_encrypt_stream` and stay open
+/// for as many requests as the client wants to send. Clients may pipeline:
+/// each request runs on its own thread and replies come back in completion
+/// order, tagged with the request's `id`.
+#[cfg(unix)]
+pub fn run_server(socket_path: &Path) -> Result<()> {
+    use std::os::unix::net::UnixListener;
+    use std::thread;
+
+    // A socket left behind by a previous run would make bind fail
+    if socket_path.exists() {
+        std::fs::remove_file(socket_path)
+            .with_context(|| format!("Failed to remove stale socket: {}", socket_path.display()))?;
+    }
+
+    let listener = UnixListener::bind(socket_path)
+        .with_context(|| format!("Failed to bind socket: {}", socket_path.display()))?;
+    log::info!("Serving requests on {}", socket_path.display());
+
+    for stream in listener.incoming() {
+        match stream {
+            Ok(stream) => {
+                thread::spawn(move || {
+                    if let Err(e) = serve_connection(stream) {
+                        log::warn!("Connection closed: {:#}", e);
+                    }
+                });
+            }
+            Err(e) => log::warn!("Failed to accept connection: {}", e),
+        }
+    }
+
+    Ok(())
+}
+
+#[cfg(unix)]
+fn serve_connection(stream: std::os::unix::net::UnixStream) -> Result<()> {
+    use std::sync::{Arc, Mutex, PoisonError};
+    use std::thread;
+
+    let mut reader = io::BufReader::new(stream.try_clone().context("Failed to clone connection")?);
+    // Shared by the request threads; the lock keeps their frames from interleaving
+    let writer = Arc::new(Mutex::new(stream));
+
+    while let Some(frame) = read_frame(&mut reader)? {
+        let writer = Arc::clone(&writer);
+        thread::spawn(move || {
+            let result = handle_frame(&frame, true).and_then(|response| {
+                let mut writer = writer.lock().unwrap_or_else(PoisonError::into_inner);
+                write_frame(&mut *writer, &response)
+            });
+            if let Err(e) = result {
+                log::warn!("Failed to answer request: {:#}", e);
+            }
+        });
+    }
+
+    Ok(())
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[derive(Serialize)]
+    struct EncryptRequest<'a> {
+        op: &'a str,
+        id: u32,
+        #[serde(with = "serde_bytes")]
+        data: &'a [u8],
+        password: &'a str,
+    }
+
+    #[derive(Serialize)]
+    struct UnknownRequest<'a> {
+        op: &'a str,
+        id: u32,
+    }
+
+    /// `Response` as the Python bridge sees it
+    #[derive(Debug, Deserialize)]
+    struct DecodedResponse {
+        id: u32,
+        ok: bool,
+        #[serde(with = "serde_bytes")]
+        data: Vec<u8>,
+        error: Option<String>,
+    }
+
+    fn roundtrip(frame: &[u8], allow_shred: bool) -> DecodedResponse {
+        let response = handle_frame(frame, allow_shred).expect("handle_frame failed");
+        rmp_serde::from_slice(&response).expect("response is not a msgpack map")
+    }
+
+    #[test]
+    fn encrypt_request_echoes_id() {
+        let request = EncryptRequest { op: "encrypt", id: 42, data: b"hello gongle", password: "hunter2" };
+        let frame = rmp_serde::to_vec_named(&request).unwrap();
+
+        let response = roundtrip(&frame, false);
+        assert_eq!(response.id, 42);
+        assert!(response.ok);
+        assert!(response.error.is_none());
+        assert!(!response.data.is_empty());
+        assert_ne!(response.data, b"hello gongle");
+    }
+
+    #[test]
+    fn unknown_op_is_reported_with_its_id() {
+        let frame = rmp_serde::to_vec_named(&UnknownRequest { op: "bogus", id: 7 }).unwrap();
+
+        let response = roundtrip(&frame, true);
+        assert_eq!(response.id, 7);
+        assert!(!response.ok);
+        assert!(response.data.is_empty());
+        assert!(response.error.unwrap().starts_with("Malformed request"));
+    }
+
+    #[test]
+    fn undecodable_frame_gets_id_zero() {
+        // 0xc1 is the one byte msgpack never uses
+        let response = roundtrip(&[0xc1], true);
+        assert_eq!(response.id, 0);
+        assert!(!response.ok);
+        assert!(response.error.unwrap().starts_with("Malformed request"));
+    }
+
+    #[test]
+    fn shred_is_refused_on_stdio() {
+        #[derive(Serialize)]
+        struct ShredRequest<'a> {
+            op: &'a str,
+            id: u32,
+            path: &'a str,
+            passes: u8,
+        }
+        let request = ShredRequest { op: "shred", id: 3, path: "/nonexistent", passes: 1 };
+        let frame = rmp_serde::to_vec_named(&request).unwrap();
+
+        let response = roundtrip(&frame, false);
+        assert_eq!(response.id, 3);
+        assert!(!response.ok);
+        assert!(response.error.unwrap().contains("serve"));
+    }
+}